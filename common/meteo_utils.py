@@ -1,7 +1,11 @@
+import asyncio
 import random
 import time
+from enum import Enum
+from math import ceil
 
-from numpy import linspace, searchsorted
+from numpy import array, asarray, ceil as npceil, clip, float64, intp, linspace, load, rint, round as np_round, \
+    savez, where
 from scipy.stats import norm
 
 # Approximated realistic ranges for air condition parameters
@@ -18,10 +22,24 @@ OPTIMAL_CO2 = 400
 OPTIMAL_HUMIDITY = 40
 
 
+# Number of equidistant values of the wellness lookup tables
+DEFAULT_RESOLUTION = 1000
+
 MIN_PROCESS_TIME = 0.5
 MAX_PROCESS_TIME = 3.5
 
 
+class LatencyMode(Enum):
+    """
+    How the processing time of the MeteoDataProcessor is simulated.
+    Blocking sleeps in the processing call, async leaves the delay to be awaited with
+    MeteoDataProcessor.simulate_execution_time_async and none disables it.
+    """
+    Blocking = 'blocking'
+    Async = 'async'
+    Disabled = 'none'
+
+
 class MeteoDataDetector:
     """
     Simulates an air conditions detector.
@@ -101,6 +119,105 @@ class MeteoDataDetector:
         return { "co2": self.gen_co2() }
 
 
+class WellnessLookupTable:
+    """
+    Precomputed wellness values of an air condition parameter over an evenly spaced space of its accepted range.
+    Since the space is evenly spaced, the position of a value is computed arithmetically in constant time
+    instead of searching the space.
+
+    ...
+
+    Attributes
+    ----------
+    min_val : float
+        lower limit of the space.
+    max_val : float
+        upper limit of the space.
+    space : numpy.ndarray
+        equidistant values covering the space.
+    values : numpy.ndarray
+        normalized wellness values for each of the space values (zeros are replaced by 0.001).
+    exact : bool
+        if True, positions are resolved exactly like a searchsorted over the space (first space value greater or
+        equal than the looked up value). Otherwise, the nearest space value is used.
+    """
+
+    def __init__(self, min_val, max_val, values, exact=True):
+        """
+        Initializes the lookup table from the wellness values of an evenly spaced space.
+        :param min_val: lower limit of the space.
+        :param max_val: upper limit of the space.
+        :param values: wellness values for each of the space values.
+        :param exact: whether to resolve positions exactly like a searchsorted over the space.
+        """
+        values = asarray(values, dtype=float64)
+        self.min_val = float(min_val)
+        self.max_val = float(max_val)
+        self.space = linspace(self.min_val, self.max_val, len(values))
+        self.values = where(values == 0, 0.001, values)
+        self.exact = exact
+        # plain lists are faster than arrays for single lookups. Values are kept as numpy floats so that
+        # rounding behaves as in the vectorized lookups
+        self._space_list = self.space.tolist()
+        self._values_list = list(self.values)
+        self._last = len(values) - 1
+        self._inv_step = self._last / (self.max_val - self.min_val)
+
+    @classmethod
+    def from_distribution(cls, min_val, max_val, opt_val, resolution=DEFAULT_RESOLUTION, exact=True):
+        """
+        Builds the lookup table of a skewed gaussian distribution.
+        :param min_val: lower limit of the space.
+        :param max_val: upper limit of the space.
+        :param opt_val: center of the space.
+        :param resolution: number of equidistant values of the space.
+        :param exact: whether to resolve positions exactly like a searchsorted over the space.
+        :return: the lookup table.
+        """
+        _, values = _gen_distribution(min_val, max_val, opt_val, resolution)
+        return cls(min_val, max_val, values, exact)
+
+    def lookup(self, x):
+        """
+        Get the wellness value of a single value.
+        :param x: a value within the space.
+        :return: wellness value of x.
+        """
+        offset = (x - self.min_val) * self._inv_step
+        if not self.exact:
+            return self._values_list[min(max(int(offset + 0.5), 0), self._last)]
+        position = min(max(ceil(offset), 0), self._last)
+        # fix floating point rounding errors of the computed position
+        if position > 0 and self._space_list[position - 1] >= x:
+            position -= 1
+        elif position < self._last and self._space_list[position] < x:
+            position += 1
+        return self._values_list[position]
+
+    def lookup_many(self, xs):
+        """
+        Get the wellness values of an array of values.
+        :param xs: array-like of values within the space.
+        :return: array with the wellness value of each value of xs.
+        """
+        xs = asarray(xs, dtype=float64)
+        offsets = (xs - self.min_val) * self._inv_step
+        if not self.exact:
+            return self.values[clip(rint(offsets), 0, self._last).astype(intp)]
+        positions = clip(npceil(offsets), 0, self._last).astype(intp)
+        # fix floating point rounding errors of the computed positions
+        positions -= (positions > 0) & (self.space[positions - 1] >= xs)
+        positions += (positions < self._last) & (self.space[positions] < xs)
+        return self.values[positions]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(min_val={self.min_val}, max_val={self.max_val}, " \
+               f"resolution={len(self)}, exact={self.exact})"
+
+
 class MeteoDataProcessor:
     """
         Simulates an air wellness calculator.
@@ -112,30 +229,58 @@ class MeteoDataProcessor:
 
         Attributes
         ----------
-        temperature_space : list
-            1000 equidistant values covering the accepted temperature range.
-        temperature_vals : list
-            Normalize wellness values for each of the temperature space values.
-        co2_space : list
-            1000 equidistant values covering the accepted co2 concentration range.
-        co2_vals : list
-            Normalize wellness values for each of the co2 space values.
-        humidity_space : list
-            1000 equidistant values covering the accepted humidity concentration range.
-        humidity_vals : list
-            Normalize wellness values for each of the humidity space values.
+        temperature_table : WellnessLookupTable
+            wellness values covering the accepted temperature range.
+        co2_table : WellnessLookupTable
+            wellness values covering the accepted co2 concentration range.
+        humidity_table : WellnessLookupTable
+            wellness values covering the accepted humidity percentage range.
+        latency_mode : LatencyMode
+            how the processing time is simulated.
         """
 
-    def __init__(self):
+    def __init__(self, resolution=DEFAULT_RESOLUTION, exact=True, tables=None, latency_mode=LatencyMode.Blocking):
         """
-        Initializes distributions (space and values) for each of the air wellness parameters (temperature,
+        Initializes the lookup tables for each of the air wellness parameters (temperature,
         co2 concentration and humidity percentage).
+        :param resolution: number of equidistant values of each lookup table. The default resolution with exact
+        lookups gives the original searchsorted results, a finer resolution gives more precise values.
+        :param exact: whether to resolve positions exactly like a searchsorted over the space of the tables.
+        :param tables: prebuilt lookup tables, as returned by the tables property or load_tables, to use
+        instead of building them.
+        :param latency_mode: how the processing time is simulated.
+        """
+        self.latency_mode = latency_mode
+
+        if tables is None:
+            tables = {
+                "temperature": WellnessLookupTable.from_distribution(MIN_TEMPERATURE, MAX_TEMPERATURE,
+                                                                     OPTIMAL_TEMPERATURE, resolution, exact),
+                "co2": WellnessLookupTable.from_distribution(MIN_CO2, MAX_CO2, OPTIMAL_CO2, resolution, exact),
+                "humidity": WellnessLookupTable.from_distribution(MIN_HUMIDITY, MAX_HUMIDITY, OPTIMAL_HUMIDITY,
+                                                                  resolution, exact),
+            }
+        self.temperature_table = tables["temperature"]
+        self.co2_table = tables["co2"]
+        self.humidity_table = tables["humidity"]
+
+    @property
+    def tables(self):
         """
+        Lookup tables of the processor, by parameter name.
+        """
+        return {
+            "temperature": self.temperature_table,
+            "co2": self.co2_table,
+            "humidity": self.humidity_table,
+        }
 
-        self.temperature_space, self.temperature_vals = _gen_distribution(MIN_TEMPERATURE, MAX_TEMPERATURE,
-                                                                          OPTIMAL_TEMPERATURE)
-        self.co2_space, self.co2_vals = _gen_distribution(MIN_CO2, MAX_CO2, OPTIMAL_CO2)
-        self.humidity_space, self.humidity_vals = _gen_distribution(MIN_HUMIDITY, MAX_HUMIDITY, OPTIMAL_HUMIDITY)
+    def save_tables(self, path):
+        """
+        Saves the lookup tables of the processor so other processes can load them instead of rebuilding them.
+        :param path: path of the file (numpy .npz format).
+        """
+        save_tables(path, self.tables)
 
     def process_meteo_data(self, meteo_data):
         """
@@ -146,11 +291,9 @@ class MeteoDataProcessor:
         their respective values within the accepted ranges.
         """
 
-
-        # Get the wellness value of each parameter based on the processor's distributions.
-        temperature_wellness = _value_from_distribution(self.temperature_space, self.temperature_vals,
-                                                        meteo_data.temperature)
-        humidity_wellness = _value_from_distribution(self.humidity_space, self.humidity_vals, meteo_data.humidity)
+        # Get the wellness value of each parameter based on the processor's lookup tables.
+        temperature_wellness = self.temperature_table.lookup(meteo_data.temperature)
+        humidity_wellness = self.humidity_table.lookup(meteo_data.humidity)
 
         # Harmonic mean
         air_wellness = round(2 / (1 / temperature_wellness + 1 / humidity_wellness), 2)
@@ -165,7 +308,7 @@ class MeteoDataProcessor:
         :param meteo_data: a class with the attribute "co2" and its respective value within the accepted ranges.
         """
 
-        co2_wellness = _value_from_distribution(self.co2_space, self.co2_vals, pollution_data.co2)
+        co2_wellness = self.co2_table.lookup(pollution_data.co2)
 
         co2_wellness = round(co2_wellness, 2)
 
@@ -173,24 +316,102 @@ class MeteoDataProcessor:
 
         return co2_wellness
 
+    def process_meteo_batch(self, temperatures, humidities):
+        """
+        Processes a batch of meteorological data parameters (temperatures and humidity percentages) in a single
+        vectorized pass. Returns the same air wellness values as calling process_meteo_data on each reading.
+        The execution time is simulated for each reading, so batches take as long as processing them one by one.
+        :param temperatures: array-like of temperature values within the accepted range.
+        :param humidities: array-like of humidity percentage values within the accepted range.
+        :return: array of air wellness values, one per reading.
+        """
+
+        temperature_wellness = self.temperature_table.lookup_many(temperatures)
+        humidity_wellness = self.humidity_table.lookup_many(humidities)
+
+        # Harmonic mean
+        air_wellness = np_round(2 / (1 / temperature_wellness + 1 / humidity_wellness), 2)
+
+        self._simulate_execution_time(len(air_wellness))
+
+        return air_wellness
+
+    def process_pollution_batch(self, co2):
+        """
+        Processes a batch of co2 quantifications in a single vectorized pass. Returns the same air pollution
+        values as calling process_pollution_data on each reading.
+        The execution time is simulated for each reading, so batches take as long as processing them one by one.
+        :param co2: array-like of co2 concentration values within the accepted range.
+        :return: array of air pollution values, one per reading.
+        """
+
+        co2_wellness = np_round(self.co2_table.lookup_many(co2), 2)
+
+        self._simulate_execution_time(len(co2_wellness))
+
+        return co2_wellness
+
+    async def simulate_execution_time_async(self, readings=1):
+        """
+        Awaits the simulated processing time when the processor is in async latency mode, so the same service
+        time distribution is modelled without holding an executor thread.
+        :param readings: number of readings processed, each one taking its own simulated time.
+        """
+        if self.latency_mode == LatencyMode.Async:
+            await asyncio.sleep(_execution_time(readings))
+
+    def _simulate_execution_time(self, readings=1):
+        if self.latency_mode == LatencyMode.Blocking:
+            time.sleep(_execution_time(readings))
+
+
+def _execution_time(readings):
+    return sum(random.uniform(MIN_PROCESS_TIME, MAX_PROCESS_TIME) for _ in range(readings))
+
 
-    def _simulate_execution_time(self):
-        time.sleep(random.uniform(MIN_PROCESS_TIME, MAX_PROCESS_TIME))
+def save_tables(path, tables):
+    """
+    Saves wellness lookup tables to a file.
+    :param path: path of the file (numpy .npz format).
+    :param tables: lookup tables by parameter name.
+    """
+    arrays = {}
+    for name, table in tables.items():
+        arrays[f"{name}_values"] = table.values
+        arrays[f"{name}_params"] = array([table.min_val, table.max_val, table.exact], dtype=float64)
+    # save through a file object so numpy does not append the .npz extension to the path
+    with open(path, "wb") as f:
+        savez(f, **arrays)
 
 
+def load_tables(path):
+    """
+    Loads wellness lookup tables saved with save_tables.
+    :param path: path of the file (numpy .npz format).
+    :return: lookup tables by parameter name.
+    """
+    with load(path) as data:
+        names = [key[:-len("_values")] for key in data.files if key.endswith("_values")]
+        tables = {}
+        for name in names:
+            min_val, max_val, exact = data[f"{name}_params"]
+            tables[name] = WellnessLookupTable(min_val, max_val, data[f"{name}_values"], bool(exact))
+        return tables
+
 
-def _gen_distribution(min_val, max_val, opt_val):
+def _gen_distribution(min_val, max_val, opt_val, resolution=DEFAULT_RESOLUTION):
     """
     Generate a skewed gaussian distribution.
     :param min_val: lower limit of the space.
     :param max_val: upper limit of the space.
     :param opt_val: center of the space.
+    :param resolution: number of equidistant values of the space.
     :return: list of equidistant values within the space, probabilities of each of the values in the distribution
     """
 
     location = opt_val
     scale = _get_scale(min_val, max_val)
-    x = linspace(min_val, max_val, 1000)
+    x = linspace(min_val, max_val, resolution)
 
     p = _skew_norm_pdf(x, location, scale)
 
@@ -231,19 +452,3 @@ def _normalize_data(data):
     max_val = max(data)
     return [(d - min_val) / (max_val - min_val) for d in data]
 
-
-def _value_from_distribution(space, values, x):
-    """
-    Get the probability of a certain position in a distribution.
-    :param space: list of equidistant values within the space of the distribution.
-    :param space: list of probabilities for each of the entries in the space.
-    :param x: a value within the space of the distribution.
-    :return: probability of value x in the distribution.
-    """
-    position = searchsorted(space, [x])[0]
-    if position == len(space):
-        position -= 1
-    value = values[position]
-    if value == 0:
-        value = 0.001
-    return value
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Optional
+
+import grpc.aio
+
+from common.log import format_proto_msg
+from common.registration_service import DEFAULT_HEARTBEAT_INTERVAL
+from proto.services.registration.registration_service_pb2 import RegisterRequest, UID
+from proto.services.registration.registration_service_pb2_grpc import RegistrationServiceStub
+
+logger = logging.getLogger(__name__)
+
+
+class RegistrationClient:
+    """
+    Registers with a RegistrationService and keeps the lease of the registration alive by sending a heartbeat every
+    heartbeat_interval seconds. It registers again when the lease was lost, e.g. because it expired while the
+    service was unreachable or the service restarted.
+    """
+
+    def __init__(
+            self,
+            address: str,
+            request: RegisterRequest,
+            heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+    ):
+        logger.info(f"Initializing RegistrationClient to {address}")
+        self._request = request
+        self._heartbeat_interval = heartbeat_interval
+        self._channel = grpc.aio.insecure_channel(address)
+        self._stub = RegistrationServiceStub(self._channel)
+        self._task: Optional[asyncio.Task] = None
+
+    async def register(self):
+        logger.info(f"Registering {format_proto_msg(self._request)}")
+        await self._stub.Register(self._request)
+        self._task = asyncio.create_task(self._send_heartbeats())
+
+    async def unregister(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        try:
+            await self._stub.Unregister(UID(uid=self._request.uid), timeout=self._heartbeat_interval)
+        finally:
+            await self._channel.close()
+
+    async def _send_heartbeats(self):
+        uid = UID(uid=self._request.uid)
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            try:
+                response = await self._stub.Heartbeat(uid, timeout=self._heartbeat_interval)
+                if not response.registered:
+                    logger.warning(f"{self} lease lost, registering again")
+                    await self._stub.Register(self._request, timeout=self._heartbeat_interval)
+            except grpc.aio.AioRpcError as e:
+                # the lease is renewed by the next heartbeat, or the registration is made again once it expired
+                logger.error(f"{self} heartbeat failed: {e.code()}")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(uid={self._request.uid})"
@@ -1,10 +1,17 @@
+import asyncio
 import logging
+import time
 from typing import NamedTuple, Optional
 
 from common.observer import Observable, Observer
 
 logger = logging.getLogger(__name__)
 
+# Seconds a registration is kept without being renewed by a heartbeat
+DEFAULT_LEASE_TTL = 10
+# Seconds between two heartbeats of a registered client, so a few can be lost before its lease expires
+DEFAULT_HEARTBEAT_INTERVAL = 3
+
 
 class Address(NamedTuple):
     address: str
@@ -18,34 +25,85 @@ class Address(NamedTuple):
 class RegistrationService(Observable):
     """
     A simple registration service that keeps track of registered addresses (clients/servers).
+    Registrations are leases that expire lease_ttl seconds after their last heartbeat (never if lease_ttl is None),
+    so crashed clients are eventually dropped. Once running, expired leases are removed in bulk every lease_ttl / 2
+    seconds, notifying the observers once.
     """
 
-    def __init__(self, parent_service: str = None):
+    def __init__(self, parent_service: str = None, lease_ttl: Optional[float] = DEFAULT_LEASE_TTL):
         logger.info("Initializing RegistrationService")
         self._parent_service = parent_service
+        self._lease_ttl = lease_ttl
         self._addresses: set[Address] = set()
         self._addresses_by_uid: dict[str, Address] = {}
+        self._deadlines: dict[str, float] = {}
         self._index = 0
         self._observers: set[Observer] = set()
+        self._task: Optional[asyncio.Task] = None
 
     async def register(self, uid: str, address: Address):
+        if self._addresses_by_uid.get(uid) == address:
+            # registered again by the same client, e.g. retrying a registration that timed out
+            self._renew(uid)
+            return
         if address in self._addresses:
             logger.error(f"{self}: address {address} already registered")
             raise ValueError(f"Address {address} already registered")
         self._addresses.add(address)
         self._addresses_by_uid[uid] = address
+        self._renew(uid)
         logger.info(f"{self} registered address {address}")
         self.notify()
 
     async def unregister(self, uid: str):
         try:
-            addr = self._addresses_by_uid[uid]
+            addr = self._addresses_by_uid.pop(uid)
+            self._deadlines.pop(uid, None)
             self._addresses.remove(addr)
             logger.info(f"{self}: unregistered address {addr} with uid {uid}")
             self.notify()
         except KeyError:
             pass
 
+    async def unregister_address(self, address: Address):
+        for uid in [uid for uid, addr in self._addresses_by_uid.items() if addr == address]:
+            await self.unregister(uid)
+
+    def heartbeat(self, uid: str) -> bool:
+        """
+        Renews the lease of a registration.
+        :return: whether the uid is registered, if not it must register again.
+        """
+        if uid not in self._addresses_by_uid:
+            return False
+        self._renew(uid)
+        return True
+
+    def reap(self) -> int:
+        """
+        Removes the registrations whose lease expired.
+        :return: the number of registrations removed.
+        """
+        now = time.monotonic()
+        expired = [uid for uid, deadline in self._deadlines.items() if deadline < now]
+        if not expired:
+            return 0
+        for uid in expired:
+            del self._deadlines[uid]
+            self._addresses.discard(self._addresses_by_uid.pop(uid))
+        logger.warning(f"{self}: expired the leases of {len(expired)} registrations with uids {expired}")
+        self.notify()
+        return len(expired)
+
+    def run(self):
+        if self._lease_ttl is not None:
+            self._task = asyncio.create_task(self._reap_periodically())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
     def get_addresses(self) -> set[Address]:
         return self._addresses
 
@@ -61,5 +119,14 @@ class RegistrationService(Observable):
         for observer in self._observers:
             observer.update(self)
 
+    def _renew(self, uid: str):
+        if self._lease_ttl is not None:
+            self._deadlines[uid] = time.monotonic() + self._lease_ttl
+
+    async def _reap_periodically(self):
+        while True:
+            await asyncio.sleep(self._lease_ttl / 2)
+            self.reap()
+
     def __str__(self):
         return f"RegistrationService(parent_service={self._parent_service})"
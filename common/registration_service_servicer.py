@@ -7,7 +7,8 @@ from grpc import ServicerContext
 from common.log import format_proto_msg
 from common.registration_service import RegistrationService, Address
 from proto.services.registration import registration_service_pb2_grpc
-from proto.services.registration.registration_service_pb2 import RegisterRequest, UID
+from proto.services.registration.registration_service_pb2 import RegisterRequest, UID, \
+    HeartbeatResponse
 
 logger = logging.getLogger(__name__)
 
@@ -36,3 +37,8 @@ class RegistrationServiceServicer(registration_service_pb2_grpc.RegistrationServ
         self._background_tasks.add(task)
         task.add_done_callback(self._background_tasks.discard)
         return Empty()
+
+    async def Heartbeat(self, uid: UID, context: ServicerContext) -> HeartbeatResponse:
+        logger.debug(f"Received heartbeat {format_proto_msg(uid)} from {context.peer()}")
+        # only renews the lease, so it is cheap enough to run inline
+        return HeartbeatResponse(registered=self._registration_service.heartbeat(uid.uid))
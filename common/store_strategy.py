@@ -1,7 +1,162 @@
+import asyncio
+import logging
+import math
+import struct
+import time
 from abc import abstractmethod, ABC
-from typing import List, Tuple
+from enum import Enum
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
 
 from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_BATCH_SIZE = 100
+DEFAULT_STORE_FLUSH_INTERVAL = 10
+DEFAULT_BUCKET_RESOLUTION = 100
+DEFAULT_PARTITION_SIZE = 60000
+# Minimum time in ms between two trims of the same sorted set
+DEFAULT_TRIM_INTERVAL = 1000
+
+# Binary sorted set members: little-endian double value and int64 timestamp in ns
+BINARY_MEMBER = struct.Struct('<dq')
+
+# Returns the count, the sum, the minimum, the maximum (as strings, to keep their precision) and the greatest score
+# (timestamp in seconds) of the members of a sorted set within a range of scores, either "value:timestamp_ns"
+# strings or binary members (recognizable by their size, text members are longer)
+AGGREGATE_SORTED_SET_SCRIPT = """
+local members = redis.call('ZRANGE', KEYS[1], ARGV[1], ARGV[2], 'BYSCORE', 'WITHSCORES')
+local count, sum, min, max, last = 0, 0, math.huge, -math.huge, '0'
+for i = 1, #members, 2 do
+    local member = members[i]
+    local value
+    if #member == 16 then
+        value = struct.unpack('<d', member)
+    else
+        value = tonumber(string.sub(member, 1, string.find(member, ':', 1, true) - 1))
+    end
+    count = count + 1
+    sum = sum + value
+    min = math.min(min, value)
+    max = math.max(max, value)
+    if tonumber(members[i + 1]) > tonumber(last) then
+        last = members[i + 1]
+    end
+end
+return {count, string.format('%.17g', sum), string.format('%.17g', min), string.format('%.17g', max), last}
+"""
+
+# Adds values to the aggregates of their buckets (KEYS), ARGV holding the marker field, the value, the timestamp and
+# the expiration time in ms (0 to keep the bucket forever) of each of them. Values whose marker is already in their
+# bucket were already added and are skipped, returns whether each value was added
+UPDATE_BUCKETS_SCRIPT = """
+local added = {}
+for i = 1, #KEYS do
+    local key, marker, value = KEYS[i], ARGV[4 * i - 3], ARGV[4 * i - 2]
+    local timestamp, expire_at = ARGV[4 * i - 1], ARGV[4 * i]
+    added[i] = redis.call('HSETNX', key, marker, 1)
+    if added[i] == 1 then
+        redis.call('HINCRBY', key, 'count', 1)
+        redis.call('HINCRBYFLOAT', key, 'sum', value)
+        local bucket = redis.call('HMGET', key, 'min', 'max', 'last')
+        if not bucket[1] or tonumber(value) < tonumber(bucket[1]) then
+            redis.call('HSET', key, 'min', value)
+        end
+        if not bucket[2] or tonumber(value) > tonumber(bucket[2]) then
+            redis.call('HSET', key, 'max', value)
+        end
+        if not bucket[3] or tonumber(timestamp) > tonumber(bucket[3]) then
+            redis.call('HSET', key, 'last', timestamp)
+        end
+        if expire_at ~= '0' then
+            redis.call('PEXPIREAT', key, expire_at)
+        end
+    end
+end
+return added
+"""
+
+# Combines the aggregates of the buckets (KEYS), returned as in AGGREGATE_SORTED_SET_SCRIPT
+AGGREGATE_BUCKETS_SCRIPT = """
+local count, sum, min, max, last = 0, 0, math.huge, -math.huge, '0'
+for i = 1, #KEYS do
+    local bucket = redis.call('HMGET', KEYS[i], 'count', 'sum', 'min', 'max', 'last')
+    if bucket[1] then
+        count = count + tonumber(bucket[1])
+        sum = sum + tonumber(bucket[2])
+        min = math.min(min, tonumber(bucket[3]))
+        max = math.max(max, tonumber(bucket[4]))
+        if tonumber(bucket[5]) > tonumber(last) then
+            last = bucket[5]
+        end
+    end
+end
+return {count, string.format('%.17g', sum), string.format('%.17g', min), string.format('%.17g', max), last}
+"""
+
+
+class MemberEncoding(Enum):
+    Text = 'text'
+    Binary = 'binary'
+
+
+def encode_member(value: float, timestamp_ns: int, encoding: MemberEncoding = MemberEncoding.Text) -> Union[str, bytes]:
+    """
+    Encodes a value and its timestamp as a sorted set member, unique for each timestamp.
+    """
+    if encoding == MemberEncoding.Binary:
+        return BINARY_MEMBER.pack(value, timestamp_ns)
+    return f"{value}:{timestamp_ns}"
+
+
+def decode_members(res: Sequence[Tuple[bytes, float]]) -> List[Tuple[float, float]]:
+    """
+    Decodes the (member, score) pairs of a sorted set into (value, timestamp) pairs. Members can be in any encoding,
+    but all-binary results are decoded at once.
+    """
+    if not res:
+        return []
+    members = [x for x, _ in res]
+    if all(len(x) == BINARY_MEMBER.size for x in members):
+        return [(value, y) for (value, _), (_, y) in zip(BINARY_MEMBER.iter_unpack(b''.join(members)), res)]
+    return [
+        (BINARY_MEMBER.unpack(x)[0] if len(x) == BINARY_MEMBER.size else float(x.split(b':')[0]), y) for x, y in res
+    ]
+
+
+class Aggregate(NamedTuple):
+    """
+    Aggregated values of a key within a time window. The last timestamp is in seconds.
+    """
+    count: int = 0
+    sum: float = 0
+    min: float = math.inf
+    max: float = -math.inf
+    last_timestamp: float = 0
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0
+
+    def merge(self, other: "Aggregate") -> "Aggregate":
+        return Aggregate(
+            count=self.count + other.count,
+            sum=self.sum + other.sum,
+            min=min(self.min, other.min),
+            max=max(self.max, other.max),
+            last_timestamp=max(self.last_timestamp, other.last_timestamp),
+        )
+
+    @classmethod
+    def from_script(cls, res: Sequence) -> "Aggregate":
+        """
+        Builds an aggregate from the result of the aggregation scripts.
+        """
+        count, total, minimum, maximum, last = res
+        if not int(count):
+            return cls()
+        return cls(int(count), float(total), float(minimum), float(maximum), float(last))
 
 
 class StoreStrategy(ABC):
@@ -13,28 +168,456 @@ class StoreStrategy(ABC):
     async def get(self, key: str, start: float, end: float) -> List[Tuple[float, float]]:
         pass
 
+    async def store_many(self, key: str, items: Sequence[Tuple[int, float]]) -> List[bool]:
+        """
+        Stores several (timestamp_ns, value) items in a key.
+        :return: whether each item was stored.
+        """
+        return [bool(res) for res in await asyncio.gather(*[self.store(key, ts, value) for ts, value in items])]
+
+    async def aggregate(self, key: str, start: float, end: float) -> Aggregate:
+        """
+        Aggregates the values of a key from a timestamp in seconds (included) to another one (excluded), so that
+        the aggregates of consecutive intervals can be merged.
+        """
+        res = [x for x in await self.get(key, start, end) if x[1] < end]
+        if not res:
+            return Aggregate()
+        values = [x[0] for x in res]
+        return Aggregate(len(res), sum(values), min(values), max(values), max(x[1] for x in res))
+
+    @property
+    def evicted(self) -> int:
+        """
+        Number of points removed by the retention policy (0 for stores whose points are expired by redis itself).
+        """
+        return 0
+
+    @property
+    def resolution(self) -> int:
+        """
+        Granularity in ms of the bounds of the intervals that can be aggregated (1 for stores of raw values).
+        """
+        return 1
+
+    async def close(self):
+        pass
+
 
 class SortedSetStoreStrategy(StoreStrategy):
-    def __init__(self, redis: Redis):
+    """
+    Stores the values of each key as members of a sorted set scored by their timestamp, either "value:timestamp_ns"
+    strings or packed binary ones (16 bytes), depending on the encoding. Both encodings are read.
+    If a retention (in ms) is given, the members older than the retention with respect to the newest stored one are
+    removed along with a write, at most once every trim_interval ms per key.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            retention: Optional[int] = None,
+            trim_interval: int = DEFAULT_TRIM_INTERVAL,
+            encoding: MemberEncoding = MemberEncoding.Text,
+    ):
         self._redis = redis
+        self._retention = retention
+        self._encoding = encoding
+        self._trim_interval = trim_interval
+        self._last_trims: Dict[str, float] = {}
+        self._evicted = 0
+        self._aggregate_script = redis.register_script(AGGREGATE_SORTED_SET_SCRIPT)
+
+    @property
+    def evicted(self) -> int:
+        return self._evicted
 
     async def store(self, key: str, timestamp_ns: int, value: float) -> int:
-        # add the timestamp to the value to make it unique
-        return await self._redis.zadd(key, {f"{value}:{timestamp_ns}": timestamp_ns / 1e9})
+        member = {encode_member(value, timestamp_ns, self._encoding): timestamp_ns / 1e9}
+        if not self._trim_due(key):
+            return await self._redis.zadd(key, member)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(key, member)
+            self._trim(pipe, key, timestamp_ns)
+            added, evicted = await pipe.execute()
+        self._count_evicted(key, evicted)
+        return added
+
+    async def store_many(self, key: str, items: Sequence[Tuple[int, float]]) -> List[bool]:
+        encoded = [encode_member(value, timestamp_ns, self._encoding) for timestamp_ns, value in items]
+        members = {member: timestamp_ns / 1e9 for member, (timestamp_ns, _) in zip(encoded, items)}
+        # a single round-trip that checks which members already exist, adds all of them and trims the key if due
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zmscore(key, list(members))
+            pipe.zadd(key, members)
+            if self._trim_due(key):
+                self._trim(pipe, key, max(timestamp_ns for timestamp_ns, _ in items))
+            scores, _, *evicted = await pipe.execute()
+        if evicted:
+            self._count_evicted(key, evicted[0])
+        existing = {member for member, score in zip(members, scores) if score is not None}
+        return [member not in existing for member in encoded]
 
     async def get(self, key: str, start: float, end: float) -> List[Tuple[float, float]]:
-        res = await self._redis.zrange(key, start, end, byscore=True, withscores=True)
-        return [(float(x.split(b':')[0]), y) for x, y in res]
+        return decode_members(await self._redis.zrange(key, start, end, byscore=True, withscores=True))
+
+    async def aggregate(self, key: str, start: float, end: float) -> Aggregate:
+        # computed inside redis, so only a few numbers cross the wire
+        return Aggregate.from_script(await self._aggregate_script(keys=[key], args=[start, f"({end}"]))
+
+    async def close(self):
+        if self._retention:
+            logger.info(f"{self} evicted {self._evicted} points")
+
+    def _trim_due(self, key: str) -> bool:
+        if not self._retention:
+            return False
+        now = time.monotonic()
+        if (now - self._last_trims.get(key, 0)) * 1e3 < self._trim_interval:
+            return False
+        self._last_trims[key] = now
+        return True
+
+    def _trim(self, pipe, key: str, newest_ns: int):
+        # exclusive bound, the members exactly at the retention boundary are kept
+        pipe.zremrangebyscore(key, "-inf", f"({newest_ns / 1e9 - self._retention / 1e3}")
+
+    def _count_evicted(self, key: str, evicted: int):
+        if evicted:
+            self._evicted += evicted
+            logger.debug(f"Evicted {evicted} points from {key}, {self._evicted} in total")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(retention={self._retention}, trim_interval={self._trim_interval}, " \
+               f"encoding={self._encoding.value})"
+
+
+class PartitionedSortedSetStoreStrategy(StoreStrategy):
+    """
+    Stores the values of each key like SortedSetStoreStrategy, but sharded in one sorted set per partition of
+    partition_size ms named "key:partition_start_ms", so reads only touch the partitions overlapping the requested
+    interval. If a retention (in ms) is given, whole partitions expire once their end is older than the retention.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            partition_size: int = DEFAULT_PARTITION_SIZE,
+            retention: Optional[int] = None,
+            encoding: MemberEncoding = MemberEncoding.Text,
+    ):
+        self._redis = redis
+        self._partition_size = partition_size
+        self._retention = retention
+        self._encoding = encoding
+        self._aggregate_script = redis.register_script(AGGREGATE_SORTED_SET_SCRIPT)
+
+    async def store(self, key: str, timestamp_ns: int, value: float) -> int:
+        partition = timestamp_ns // 1_000_000 // self._partition_size
+        partition_key = self._partition_key(key, partition)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(partition_key, {encode_member(value, timestamp_ns, self._encoding): timestamp_ns / 1e9})
+            self._expire(pipe, partition_key, partition)
+            added, *_ = await pipe.execute()
+        return added
+
+    async def store_many(self, key: str, items: Sequence[Tuple[int, float]]) -> List[bool]:
+        encoded = [encode_member(value, timestamp_ns, self._encoding) for timestamp_ns, value in items]
+        partitions: Dict[int, Dict[Union[str, bytes], float]] = {}
+        for member, (timestamp_ns, _) in zip(encoded, items):
+            partition = timestamp_ns // 1_000_000 // self._partition_size
+            partitions.setdefault(partition, {})[member] = timestamp_ns / 1e9
+        # a single round-trip that checks which members already exist and adds all of them to their partitions
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for partition, members in partitions.items():
+                pipe.zmscore(self._partition_key(key, partition), list(members))
+            for partition, members in partitions.items():
+                partition_key = self._partition_key(key, partition)
+                pipe.zadd(partition_key, members)
+                self._expire(pipe, partition_key, partition)
+            res = await pipe.execute()
+        existing = {
+            member
+            for members, scores in zip(partitions.values(), res)
+            for member, score in zip(members, scores) if score is not None
+        }
+        return [member not in existing for member in encoded]
+
+    async def get(self, key: str, start: float, end: float) -> List[Tuple[float, float]]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for partition_key in self._partition_keys(key, start, end):
+                pipe.zrange(partition_key, start, end, byscore=True, withscores=True)
+            partitions = await pipe.execute()
+        return decode_members([x for res in partitions for x in res])
+
+    async def aggregate(self, key: str, start: float, end: float) -> Aggregate:
+        # the partitions are aggregated inside redis and merged here
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for partition_key in self._partition_keys(key, start, end):
+                await self._aggregate_script(keys=[partition_key], args=[start, f"({end}"], client=pipe)
+            partitions = await pipe.execute()
+        res = Aggregate()
+        for partition in partitions:
+            res = res.merge(Aggregate.from_script(partition))
+        return res
+
+    def _expire(self, pipe, partition_key: str, partition: int):
+        if self._retention:
+            pipe.pexpireat(partition_key, (partition + 1) * self._partition_size + self._retention)
+
+    def _partition_keys(self, key: str, start: float, end: float) -> List[str]:
+        first = math.floor(start * 1e3 / self._partition_size)
+        last = math.floor(end * 1e3 / self._partition_size)
+        return [self._partition_key(key, partition) for partition in range(first, last + 1)]
+
+    def _partition_key(self, key: str, partition: int) -> str:
+        return f"{key}:{partition * self._partition_size}"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(partition_size={self._partition_size}, retention={self._retention}, " \
+               f"encoding={self._encoding.value})"
 
 
 class TimeSeriesStoreStrategy(StoreStrategy):
-    def __init__(self, redis: Redis):
+    """
+    Stores the values of each key in a RedisTimeSeries key.
+    If a retention (in ms) is given, the keys are created (or altered) with it and redis drops the older samples.
+    """
+
+    def __init__(self, redis: Redis, retention: Optional[int] = None):
+        self._redis = redis
         self._ts = redis.ts()
+        self._retention = retention
+        self._created: Set[str] = set()
 
     async def store(self, key: str, timestamp_ns: int, value: float) -> int:
+        await self._create(key)
         return await self._ts.add(key, int(timestamp_ns / 1e6), value)
 
+    async def store_many(self, key: str, items: Sequence[Tuple[int, float]]) -> List[bool]:
+        # unlike TS.ADD, TS.MADD does not create the key
+        await self._create(key)
+        res = await self._ts.madd([(key, int(timestamp_ns / 1e6), value) for timestamp_ns, value in items])
+        return [not isinstance(x, Exception) for x in res]
+
     async def get(self, key: str, start: float, end: float) -> List[Tuple[float, float]]:
         start, end = int(start * 1e3), int(end * 1e3)  # convert to milliseconds
         res = await self._ts.range(key, start, end)
         return [(float(x[1]), x[0]) for x in res]
+
+    async def aggregate(self, key: str, start: float, end: float) -> Aggregate:
+        start, end = int(start * 1e3), int(end * 1e3) - 1  # convert to milliseconds, excluding the end
+        # a single bucket covering the whole range for each aggregation, plus the last sample
+        # (the pipeline of the timeseries client is not asynchronous, so raw commands are used)
+        bucket = end - start + 1
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for aggregation in ("count", "sum", "min", "max"):
+                pipe.execute_command("TS.RANGE", key, start, end, "ALIGN", "-", "AGGREGATION", aggregation, bucket)
+            pipe.execute_command("TS.REVRANGE", key, start, end, "COUNT", 1)
+            try:
+                count, total, minimum, maximum, last = await pipe.execute()
+            except ResponseError as e:
+                # the key does not exist until the first sample is stored
+                logger.debug(f"Failed to aggregate {key}: {e}")
+                return Aggregate()
+        if not last:
+            return Aggregate()
+        return Aggregate(
+            int(float(count[0][1])),
+            float(total[0][1]),
+            float(minimum[0][1]),
+            float(maximum[0][1]),
+            int(last[0][0]) / 1e3,
+        )
+
+    async def _create(self, key: str):
+        if key in self._created:
+            return
+        try:
+            await self._ts.create(key, retention_msecs=self._retention)
+        except ResponseError as e:
+            if "already exists" not in str(e):
+                raise
+            # keys created before the retention was set (or changed) keep their own
+            if self._retention:
+                await self._ts.alter(key, retention_msecs=self._retention)
+        self._created.add(key)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(retention={self._retention})"
+
+
+class BucketedStoreStrategy(StoreStrategy):
+    """
+    Keeps running aggregates (count, sum, min, max and last timestamp) of the values stored in each bucket of
+    resolution ms, instead of the values themselves. Buckets are hashes named "key:bucket_start_ms" that are updated
+    atomically when a value is stored, so aggregating any interval only combines the few buckets it spans.
+    Each value also leaves a marker field in its bucket, so storing it again (e.g. a retried write) is not counted
+    twice, as with the sorted set stores.
+    Intervals whose bounds are not multiples of the resolution are widened to the buckets they overlap when read
+    with get, and rejected by aggregate, as the aggregates of consecutive widened intervals would overlap.
+    If a retention (in ms) is given, each bucket expires once its end is older than the retention.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            resolution: int = DEFAULT_BUCKET_RESOLUTION,
+            retention: Optional[int] = None,
+    ):
+        self._redis = redis
+        self._resolution = resolution
+        self._retention = retention
+        self._update_script = redis.register_script(UPDATE_BUCKETS_SCRIPT)
+        self._aggregate_script = redis.register_script(AGGREGATE_BUCKETS_SCRIPT)
+
+    async def store(self, key: str, timestamp_ns: int, value: float) -> int:
+        return (await self.store_many(key, [(timestamp_ns, value)]))[0]
+
+    async def store_many(self, key: str, items: Sequence[Tuple[int, float]]) -> List[bool]:
+        keys, args = [], []
+        for timestamp_ns, value in items:
+            bucket = timestamp_ns // 1_000_000 // self._resolution
+            expire_at = (bucket + 1) * self._resolution + self._retention if self._retention else 0
+            keys.append(self._bucket_key(key, bucket))
+            marker = f"item:{encode_member(value, timestamp_ns)}"
+            args.extend((marker, repr(float(value)), repr(timestamp_ns / 1e9), expire_at))
+        return [bool(added) for added in await self._update_script(keys=keys, args=args)]
+
+    async def get(self, key: str, start: float, end: float) -> List[Tuple[float, float]]:
+        # values are not kept, so each bucket is returned as its mean at its last timestamp
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for bucket_key in self._bucket_keys(key, start, end):
+                pipe.hmget(bucket_key, "count", "sum", "last")
+            buckets = await pipe.execute()
+        return [(float(total) / int(count), float(last)) for count, total, last in buckets if count]
+
+    @property
+    def resolution(self) -> int:
+        return self._resolution
+
+    async def aggregate(self, key: str, start: float, end: float) -> Aggregate:
+        if round(start * 1e3) % self._resolution or round(end * 1e3) % self._resolution:
+            raise ValueError(f"Interval from {start} to {end} is not aligned to buckets of {self._resolution} ms")
+        return Aggregate.from_script(await self._aggregate_script(keys=self._bucket_keys(key, start, end)))
+
+    def _bucket_keys(self, key: str, start: float, end: float) -> List[str]:
+        first = math.floor(start * 1e3 / self._resolution)
+        last = max(math.ceil(end * 1e3 / self._resolution) - 1, first)
+        return [self._bucket_key(key, bucket) for bucket in range(first, last + 1)]
+
+    def _bucket_key(self, key: str, bucket: int) -> str:
+        return f"{key}:{bucket * self._resolution}"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(resolution={self._resolution}, retention={self._retention})"
+
+
+class BufferedStoreStrategy(StoreStrategy):
+    """
+    Gathers the writes of concurrent callers and flushes them through the store_many method of another strategy,
+    once max_batch_size writes are pending or flush_interval ms after the first pending write.
+    Each caller waits for the flush of its write and gets whether it was stored.
+    """
+
+    def __init__(
+            self,
+            store: StoreStrategy,
+            max_batch_size: int = DEFAULT_STORE_BATCH_SIZE,
+            flush_interval: int = DEFAULT_STORE_FLUSH_INTERVAL,
+    ):
+        self._store = store
+        self._max_batch_size = max_batch_size
+        self._flush_interval = flush_interval
+        self._pending: Dict[str, List[Tuple[int, float, asyncio.Future]]] = {}
+        self._pending_count = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._background_tasks = set()
+
+    async def store(self, key: str, timestamp_ns: int, value: float) -> int:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append((timestamp_ns, value, future))
+        self._pending_count += 1
+        if self._pending_count >= self._max_batch_size:
+            self._flush()
+        elif not self._timer:
+            self._timer = loop.call_later(self._flush_interval / 1000, self._flush)
+        return await future
+
+    async def store_many(self, key: str, items: Sequence[Tuple[int, float]]) -> List[bool]:
+        return await self._store.store_many(key, items)
+
+    async def get(self, key: str, start: float, end: float) -> List[Tuple[float, float]]:
+        return await self._store.get(key, start, end)
+
+    async def aggregate(self, key: str, start: float, end: float) -> Aggregate:
+        return await self._store.aggregate(key, start, end)
+
+    @property
+    def resolution(self) -> int:
+        return self._store.resolution
+
+    @property
+    def evicted(self) -> int:
+        return self._store.evicted
+
+    async def close(self):
+        self._flush()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        await self._store.close()
+
+    def _flush(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        for key, writes in self._pending.items():
+            task = asyncio.create_task(self._write(key, writes))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        self._pending = {}
+        self._pending_count = 0
+
+    async def _write(self, key: str, writes: List[Tuple[int, float, asyncio.Future]]):
+        logger.debug(f"Flushing {len(writes)} writes to {key}")
+        try:
+            stored = await self._store.store_many(key, [(timestamp_ns, value) for timestamp_ns, value, _ in writes])
+        except Exception as e:
+            for _, _, future in writes:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), ok in zip(writes, stored):
+            if not future.done():
+                future.set_result(int(ok))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(store={self._store.__class__.__name__}, " \
+               f"max_batch_size={self._max_batch_size}, flush_interval={self._flush_interval})"
+
+
+class StoreType(Enum):
+    SortedSet = 'sorted_set'
+    PartitionedSortedSet = 'partitioned_sorted_set'
+    TimeSeries = 'time_series'
+    Bucketed = 'bucketed'
+
+
+def create_store_strategy(
+        store_type: StoreType,
+        redis: Redis,
+        bucket_resolution: int = DEFAULT_BUCKET_RESOLUTION,
+        retention: Optional[int] = None,
+        trim_interval: int = DEFAULT_TRIM_INTERVAL,
+        partition_size: int = DEFAULT_PARTITION_SIZE,
+        encoding: MemberEncoding = MemberEncoding.Text,
+) -> StoreStrategy:
+    if store_type == StoreType.SortedSet:
+        return SortedSetStoreStrategy(redis, retention, trim_interval, encoding)
+    elif store_type == StoreType.PartitionedSortedSet:
+        return PartitionedSortedSetStoreStrategy(redis, partition_size, retention, encoding)
+    elif store_type == StoreType.TimeSeries:
+        return TimeSeriesStoreStrategy(redis, retention)
+    elif store_type == StoreType.Bucketed:
+        return BucketedStoreStrategy(redis, bucket_resolution, retention)
+    else:
+        raise ValueError(f"Invalid store type {store_type}")
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from enum import Enum
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE_SIZE = 1000
+DEFAULT_MAX_IN_FLIGHT = 100
+DEFAULT_CLOSE_TIMEOUT = 5
+# Seconds between queue depth reports
+REPORT_INTERVAL = 10
+
+
+class OverflowPolicy(Enum):
+    Reject = 'reject'
+    DropOldest = 'drop_oldest'
+    Block = 'block'
+
+
+class AdmissionQueue:
+    """
+    A bounded queue of pending jobs (forwards of readings) consumed by max_in_flight workers.
+    When the queue is full, new jobs are rejected, replace the oldest queued job or wait for room,
+    depending on the overflow policy.
+    """
+
+    def __init__(
+            self,
+            max_size: int = DEFAULT_MAX_QUEUE_SIZE,
+            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+            policy: OverflowPolicy = OverflowPolicy.Reject,
+    ):
+        logger.info(f"Initializing AdmissionQueue with max size {max_size}, max in flight {max_in_flight} "
+                    f"and overflow policy {policy.value}")
+        self._queue: asyncio.Queue[Callable[[], Awaitable]] = asyncio.Queue(max_size)
+        self._max_in_flight = max_in_flight
+        self._policy = policy
+        self._in_flight = 0
+        self._rejected = 0
+        self._dropped = 0
+        self._workers = [asyncio.create_task(self._work()) for _ in range(max_in_flight)]
+        self._reporter = asyncio.create_task(self._report())
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def rejected(self) -> int:
+        return self._rejected
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    async def put(self, job: Callable[[], Awaitable]) -> bool:
+        """
+        Queues a job.
+        :return: False if the job was rejected because the queue is full, True otherwise.
+        """
+        if self._policy == OverflowPolicy.Block:
+            await self._queue.put(job)
+            return True
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            if self._policy == OverflowPolicy.Reject:
+                self._rejected += 1
+                return False
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self._dropped += 1
+            self._queue.put_nowait(job)
+        return True
+
+    async def close(self, timeout: float = DEFAULT_CLOSE_TIMEOUT):
+        """
+        Waits up to timeout seconds for the queued jobs to be done and stops the workers.
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self} closed with pending jobs")
+        for task in self._workers + [self._reporter]:
+            task.cancel()
+        await asyncio.gather(*self._workers, self._reporter, return_exceptions=True)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            self._in_flight += 1
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"{self} job failed: {e}")
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            logger.info(f"{self}")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(depth={self.depth}, in_flight={self._in_flight}, " \
+               f"rejected={self._rejected}, dropped={self._dropped}, policy={self._policy.value})"
@@ -1,57 +1,178 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import random
+import time
 from abc import ABC, abstractmethod
-from typing import Sequence
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
 
 import grpc.aio
 
 from common.log import format_proto_msg
 from common.observer import Observer
 from common.registration_service import RegistrationService, Address
-from proto.messages.meteo.meteo_messages_pb2 import RawMeteoData, RawPollutionData
+from micro_batcher import MicroBatcher, DEFAULT_BATCH_LINGER
+from proto.messages.meteo.meteo_messages_pb2 import RawMeteoData, RawPollutionData, RawMeteoDataBatch, \
+    RawPollutionDataBatch
 from proto.services.processing.processing_service_pb2_grpc import ProcessingServiceStub
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# Seconds given to in-flight calls of a removed server before its channel is closed
+CHANNEL_CLOSE_GRACE = 5
+
+# EWMA strategy parameters
+DEFAULT_EWMA_ALPHA = 0.3
+DEFAULT_MAX_FAILURES = 5
+DEFAULT_EJECTION_TIME = 30
+# Expected cost multiplier of an address that always fails
+ERROR_PENALTY = 10
+# Lower bound of the latencies (in seconds) used to weight the addresses
+MIN_LATENCY = 1e-3
+# Deadline of the calls of the EWMA strategy without a fixed one: a multiple of the latency of the address,
+# but never lower than MIN_ADAPTIVE_TIMEOUT seconds
+ADAPTIVE_TIMEOUT_MULTIPLIER = 10
+MIN_ADAPTIVE_TIMEOUT = 5
+
 
 class LoadBalancer(Observer):
     """
     A simple load balancer that rotates through a list of servers.
+    If batch_size is greater than 1, readings are buffered per server and forwarded in batches of up to
+    batch_size readings, waiting at most batch_linger ms for a batch to fill. Sending a reading then returns once
+    its batch was sent, so callers limiting their concurrent sends also limit the pending batches.
+    Calls not completed within timeout seconds (by default, the deadline given by the strategy, if any) fail and
+    are reported as timed out to the strategy.
     """
 
-    def __init__(self, registration_service: RegistrationService, strategy: LoadBalancingStrategy = None):
+    def __init__(
+            self,
+            registration_service: RegistrationService,
+            strategy: LoadBalancingStrategy = None,
+            batch_size: int = 1,
+            batch_linger: Optional[int] = None,
+            timeout: Optional[float] = None,
+    ):
         logger.info("Initializing LoadBalancer")
         self._registration_service = registration_service
         self._strategy = strategy or RoundRobinLoadBalancingStrategy(list(registration_service.get_addresses()))
-        self._channels = {}
+        self._channels: Dict[Address, grpc.aio.Channel] = {}
+        self._stubs: Dict[Address, ProcessingServiceStub] = {}
+        self._timeout = timeout
+        self._background_tasks = set()
+        self._meteo_batcher: Optional[MicroBatcher[RawMeteoData]] = None
+        self._pollution_batcher: Optional[MicroBatcher[RawPollutionData]] = None
+        if batch_size > 1:
+            batch_linger = batch_linger or DEFAULT_BATCH_LINGER
+            self._meteo_batcher = MicroBatcher(self._send_meteo_batch, batch_size, batch_linger)
+            self._pollution_batcher = MicroBatcher(self._send_pollution_batch, batch_size, batch_linger)
         registration_service.attach(self)
 
     def update(self, subject: RegistrationService):
         addresses = list(subject.get_addresses())
         logger.debug(f"LoadBalancer received update from {subject} with addresses {addresses}")
         self._strategy.update(addresses)
-        self._channels = {address: grpc.aio.insecure_channel(str(address)) for address in addresses}
+
+        # open channels only for new addresses, existing ones are kept
+        for address in addresses:
+            if address not in self._channels:
+                logger.debug(f"Opening channel to {address}")
+                self._channels[address] = grpc.aio.insecure_channel(str(address))
+                self._stubs[address] = ProcessingServiceStub(self._channels[address])
+
+        # close the channels of removed addresses once their in-flight calls finish
+        for address in set(self._channels) - set(addresses):
+            logger.debug(f"Closing channel to {address}")
+            del self._stubs[address]
+            task = asyncio.create_task(self._channels.pop(address).close(CHANNEL_CLOSE_GRACE))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            self._reroute(address)
+
+    def _reroute(self, address: Address):
+        # send the readings buffered for a removed address to the remaining ones
+        for batcher in (self._meteo_batcher, self._pollution_batcher):
+            if not batcher:
+                continue
+            entries = batcher.discard(address)
+            if not entries:
+                continue
+            try:
+                while entries:
+                    item, future = entries[0]
+                    batcher.add(self._strategy.get_address(), item, future)
+                    entries.pop(0)
+                logger.debug(f"Rerouted the readings buffered for {address}")
+            except ValueError as e:
+                logger.error(f"Failed to reroute {len(entries)} readings buffered for {address}: {e}")
+                # the senders of the readings that could not be rerouted are not left waiting
+                for _, future in entries:
+                    if not future.done():
+                        future.set_exception(e)
 
     async def send_meteo_data(self, meteo_data: RawMeteoData):
         logger.debug(f"Received meteo data {format_proto_msg(meteo_data)}")
         address = self._strategy.get_address()
-        channel = self._channels[address]
-        stub = ProcessingServiceStub(channel)
+        if self._meteo_batcher:
+            await self._meteo_batcher.add(address, meteo_data)
+            return
         logger.debug(f"Sending meteo data to {address}")
-        await stub.ProcessMeteoData(meteo_data)
+        await self._call(address, self._stubs[address].ProcessMeteoData, meteo_data)
 
     async def send_pollution_data(self, pollution_data: RawPollutionData):
         logger.debug(f"Received pollution data {format_proto_msg(pollution_data)}")
         address = self._strategy.get_address()
-        channel = self._channels[address]
-        stub = ProcessingServiceStub(channel)
+        if self._pollution_batcher:
+            await self._pollution_batcher.add(address, pollution_data)
+            return
         logger.debug(f"Sending pollution data to {address}")
-        await stub.ProcessPollutionData(pollution_data)
+        await self._call(address, self._stubs[address].ProcessPollutionData, pollution_data)
+
+    async def _send_meteo_batch(self, address: Address, meteo_data: List[RawMeteoData]):
+        logger.debug(f"Sending batch of {len(meteo_data)} meteo data to {address}")
+        await self._call(address, self._stubs[address].ProcessMeteoDataBatch, RawMeteoDataBatch(data=meteo_data))
+
+    async def _send_pollution_batch(self, address: Address, pollution_data: List[RawPollutionData]):
+        logger.debug(f"Sending batch of {len(pollution_data)} pollution data to {address}")
+        await self._call(
+            address, self._stubs[address].ProcessPollutionDataBatch, RawPollutionDataBatch(data=pollution_data)
+        )
+
+    async def _call(self, address: Address, rpc: Callable[..., Awaitable], request: T):
+        # report the start and the completion of each call to the strategy
+        self._strategy.on_request_start(address)
+        start = time.monotonic()
+        success = timed_out = False
+        try:
+            await rpc(request, timeout=self._timeout or self._strategy.get_timeout(address))
+            success = True
+        except grpc.aio.AioRpcError as e:
+            timed_out = e.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+            raise
+        finally:
+            if timed_out:
+                self._strategy.on_request_timeout(address, time.monotonic() - start)
+            else:
+                self._strategy.on_request_end(address, time.monotonic() - start, success)
+
+    async def close(self):
+        """
+        Sends all the buffered readings and closes the channels.
+        """
+        for batcher in (self._meteo_batcher, self._pollution_batcher):
+            if batcher:
+                await batcher.close()
+        await asyncio.gather(*[channel.close(CHANNEL_CLOSE_GRACE) for channel in self._channels.values()])
+        self._channels.clear()
+        self._stubs.clear()
 
     def __repr__(self):
-        return f"{self.__class__.__name__}(strategy={self._strategy})"
+        return f"{self.__class__.__name__}(strategy={self._strategy}, meteo_batcher={self._meteo_batcher}, " \
+               f"pollution_batcher={self._pollution_batcher})"
 
 
 class LoadBalancingStrategy(ABC):
@@ -73,6 +194,30 @@ class LoadBalancingStrategy(ABC):
         """
         pass
 
+    def on_request_start(self, address: Address):
+        """
+        Called when a request is sent to an address.
+        """
+        pass
+
+    def on_request_end(self, address: Address, latency: float, success: bool):
+        """
+        Called when a request sent to an address completes, with its latency in seconds and whether it succeeded.
+        """
+        pass
+
+    def on_request_timeout(self, address: Address, latency: float):
+        """
+        Called when a request sent to an address exceeds its deadline, after latency seconds.
+        """
+        self.on_request_end(address, latency, False)
+
+    def get_timeout(self, address: Address) -> Optional[float]:
+        """
+        Returns the deadline in seconds of a request to an address, if any.
+        """
+        return None
+
     def __repr__(self):
         return f"{self.__class__.__name__}()"
 
@@ -112,3 +257,200 @@ class RoundRobinLoadBalancingStrategy(LoadBalancingStrategy):
 
     def update(self, addresses: Sequence[Address]):
         self._addresses = addresses
+
+
+class LeastOutstandingRequestsStrategy(LoadBalancingStrategy):
+    """
+    A load balancing strategy that chooses the address with the fewest in-flight requests.
+    Ties are broken by rotating through the list of addresses.
+    """
+
+    def __init__(self, addresses: Sequence[Address]):
+        self._addresses = addresses
+        self._outstanding: Dict[Address, int] = {address: 0 for address in addresses}
+        self._index = 0
+
+    def get_address(self) -> Address:
+        if not self._addresses or len(self._addresses) == 0:
+            raise ValueError("No servers available")
+        n = len(self._addresses)
+        candidates = [self._addresses[(self._index + i) % n] for i in range(n)]
+        self._index = (self._index + 1) % n
+        return min(candidates, key=lambda address: self._outstanding.get(address, 0))
+
+    def update(self, addresses: Sequence[Address]):
+        self._addresses = addresses
+        self._outstanding = {address: self._outstanding.get(address, 0) for address in addresses}
+
+    def on_request_start(self, address: Address):
+        if address in self._outstanding:
+            self._outstanding[address] += 1
+
+    def on_request_end(self, address: Address, latency: float, success: bool):
+        if address in self._outstanding:
+            self._outstanding[address] = max(self._outstanding[address] - 1, 0)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(outstanding={self._outstanding})"
+
+
+class PowerOfTwoChoicesStrategy(LeastOutstandingRequestsStrategy):
+    """
+    A load balancing strategy that chooses two random addresses and picks the one with the fewest in-flight requests.
+    """
+
+    def get_address(self) -> Address:
+        if not self._addresses or len(self._addresses) == 0:
+            raise ValueError("No servers available")
+        if len(self._addresses) == 1:
+            return self._addresses[0]
+        return min(random.sample(self._addresses, 2), key=lambda address: self._outstanding.get(address, 0))
+
+
+class EwmaLoadBalancingStrategy(LoadBalancingStrategy):
+    """
+    A load balancing strategy that keeps an exponentially weighted moving average (EWMA) of the latency and
+    the error rate of each address, and chooses a random address with a probability inversely proportional
+    to its expected cost (latency, penalized by the error rate).
+    As in peak EWMA, the expected latency of an address is at least the mean age of its outstanding requests, and
+    is multiplied by their number, so an address whose requests do not complete quickly loses its share before
+    any of them is measured.
+    Addresses that fail max_failures consecutive requests are ejected for ejection_time seconds.
+    Requests get a deadline of a multiple of the latency of their address. Timed out requests count as slow
+    (their latency is at least their deadline) rather than failed, so busy addresses are not ejected.
+    """
+
+    def __init__(
+            self,
+            addresses: Sequence[Address],
+            alpha: float = DEFAULT_EWMA_ALPHA,
+            max_failures: int = DEFAULT_MAX_FAILURES,
+            ejection_time: float = DEFAULT_EJECTION_TIME,
+    ):
+        self._addresses = addresses
+        self._alpha = alpha
+        self._max_failures = max_failures
+        self._ejection_time = ejection_time
+        self._latency: Dict[Address, float] = {}
+        self._error_rate: Dict[Address, float] = {}
+        self._failures: Dict[Address, int] = {}
+        self._ejected_until: Dict[Address, float] = {}
+        # number of outstanding requests and sum of their start times, for their mean age
+        self._outstanding: Dict[Address, int] = {}
+        self._outstanding_starts: Dict[Address, float] = {}
+        self._timeouts: Dict[Address, int] = {}
+
+    def get_address(self) -> Address:
+        if not self._addresses or len(self._addresses) == 0:
+            raise ValueError("No servers available")
+        now = time.monotonic()
+        candidates = [address for address in self._addresses if self._ejected_until.get(address, 0) <= now]
+        if not candidates:
+            # all the addresses are ejected, fail open instead of rejecting every request
+            candidates = self._addresses
+        # addresses without measurements are expected to be as fast as the fastest one, so they get probed
+        default_latency = min(self._latency.values(), default=0) or MIN_LATENCY
+        weights = [
+            1 / (self._expected_latency(address, default_latency, now) *
+                 (1 + ERROR_PENALTY * self._error_rate.get(address, 0)))
+            for address in candidates
+        ]
+        return random.choices(candidates, weights)[0]
+
+    def update(self, addresses: Sequence[Address]):
+        self._addresses = addresses
+        for stats in (self._latency, self._error_rate, self._failures, self._ejected_until, self._outstanding,
+                      self._outstanding_starts, self._timeouts):
+            for address in set(stats) - set(addresses):
+                del stats[address]
+
+    def on_request_start(self, address: Address):
+        if address not in self._addresses:
+            return
+        self._outstanding[address] = self._outstanding.get(address, 0) + 1
+        self._outstanding_starts[address] = self._outstanding_starts.get(address, 0) + time.monotonic()
+
+    def get_timeout(self, address: Address) -> Optional[float]:
+        if address not in self._latency:
+            return None
+        return max(self._latency[address] * ADAPTIVE_TIMEOUT_MULTIPLIER, MIN_ADAPTIVE_TIMEOUT)
+
+    def on_request_timeout(self, address: Address, latency: float):
+        if address not in self._addresses:
+            return
+        self._end_outstanding(address, latency)
+        self._timeouts[address] = self._timeouts.get(address, 0) + 1
+        if address in self._latency:
+            self._latency[address] += self._alpha * (latency - self._latency[address])
+        else:
+            self._latency[address] = latency
+            self._error_rate[address] = 0
+
+    def on_request_end(self, address: Address, latency: float, success: bool):
+        if address not in self._addresses:
+            return
+        self._end_outstanding(address, latency)
+        error = 0 if success else 1
+        if address in self._latency:
+            self._latency[address] += self._alpha * (latency - self._latency[address])
+            self._error_rate[address] += self._alpha * (error - self._error_rate[address])
+        else:
+            self._latency[address] = latency
+            self._error_rate[address] = error
+        if success:
+            self._failures[address] = 0
+            return
+        self._failures[address] = self._failures.get(address, 0) + 1
+        if self._failures[address] >= self._max_failures:
+            now = time.monotonic()
+            if self._ejected_until.get(address, 0) <= now:
+                logger.warning(f"Ejecting {address} for {self._ejection_time}s after "
+                               f"{self._failures[address]} consecutive failures")
+            self._ejected_until[address] = now + self._ejection_time
+            self._failures[address] = 0
+
+    def _end_outstanding(self, address: Address, latency: float):
+        outstanding = self._outstanding.get(address, 0) - 1
+        if outstanding > 0:
+            self._outstanding[address] = outstanding
+            self._outstanding_starts[address] -= time.monotonic() - latency
+        else:
+            self._outstanding.pop(address, None)
+            self._outstanding_starts.pop(address, None)
+
+    def _expected_latency(self, address: Address, default_latency: float, now: float) -> float:
+        latency = self._latency.get(address, default_latency)
+        outstanding = self._outstanding.get(address, 0)
+        if outstanding:
+            latency = max(latency, now - self._outstanding_starts[address] / outstanding)
+        return max(latency, MIN_LATENCY) * (1 + outstanding)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(latency={self._latency}, error_rate={self._error_rate}, " \
+               f"outstanding={self._outstanding}, timeouts={self._timeouts})"
+
+
+class LoadBalancingStrategyType(Enum):
+    RoundRobin = 'round_robin'
+    Random = 'random'
+    LeastOutstandingRequests = 'least_outstanding'
+    PowerOfTwoChoices = 'power_of_two'
+    Ewma = 'ewma'
+
+
+def create_strategy(
+        strategy_type: LoadBalancingStrategyType,
+        addresses: Sequence[Address] = (),
+) -> LoadBalancingStrategy:
+    if strategy_type == LoadBalancingStrategyType.RoundRobin:
+        return RoundRobinLoadBalancingStrategy(addresses)
+    elif strategy_type == LoadBalancingStrategyType.Random:
+        return RandomLoadBalancingStrategy(addresses)
+    elif strategy_type == LoadBalancingStrategyType.LeastOutstandingRequests:
+        return LeastOutstandingRequestsStrategy(addresses)
+    elif strategy_type == LoadBalancingStrategyType.PowerOfTwoChoices:
+        return PowerOfTwoChoicesStrategy(addresses)
+    elif strategy_type == LoadBalancingStrategyType.Ewma:
+        return EwmaLoadBalancingStrategy(addresses)
+    else:
+        raise ValueError(f"Invalid load balancing strategy {strategy_type}")
@@ -2,14 +2,17 @@ import asyncio
 import logging
 import os
 import signal
+from typing import Optional
 
 import asyncclick as click
 import grpc.aio
 
 from common.log import setup_logger, LOGGER_LEVEL_CHOICES
-from common.registration_service import RegistrationService
+from common.registration_service import RegistrationService, DEFAULT_LEASE_TTL
+from admission_queue import AdmissionQueue, OverflowPolicy, DEFAULT_MAX_QUEUE_SIZE, DEFAULT_MAX_IN_FLIGHT
 from common.registration_service_servicer import RegistrationServiceServicer
-from load_balancer import LoadBalancer
+from load_balancer import LoadBalancer, LoadBalancingStrategyType, create_strategy
+from micro_batcher import DEFAULT_BATCH_LINGER
 from meteo_service import MeteoService
 from meteo_service_servicer import MeteoServiceServicer
 from proto.services.meteo import meteo_service_pb2_grpc
@@ -28,9 +31,36 @@ _cleanup_coroutines = []
 @click.option('--log-level', type=click.Choice(LOGGER_LEVEL_CHOICES),
               default=os.environ.get('LOG_LEVEL', 'info'), help="Set the log level")
 @click.option('--port', type=int, help="Set the port", default=os.environ.get("PORT", DEFAULT_PORT))
+@click.option('--batch-size', type=int, default=os.environ.get("BATCH_SIZE", 1),
+              help="Forward readings to the servers in batches of up to this size (1 disables batching)")
+@click.option('--batch-linger', type=int, default=os.environ.get("BATCH_LINGER", DEFAULT_BATCH_LINGER),
+              help="Set the maximum time in ms a reading waits for its batch to fill")
+@click.option('--strategy', type=click.Choice([e.value for e in LoadBalancingStrategyType]),
+              default=os.environ.get("STRATEGY", LoadBalancingStrategyType.RoundRobin.value),
+              help="Set the load balancing strategy")
+@click.option('--timeout', type=float, default=os.environ.get("TIMEOUT"),
+              help="Set the deadline in seconds of the calls to the servers "
+                   "(by default, the ewma strategy derives one from the latency of each server)")
+@click.option('--max-queue-size', type=int, default=os.environ.get("MAX_QUEUE_SIZE", DEFAULT_MAX_QUEUE_SIZE),
+              help="Set the maximum number of readings waiting to be forwarded")
+@click.option('--max-in-flight', type=int, default=os.environ.get("MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT),
+              help="Set the maximum number of readings being forwarded at the same time")
+@click.option('--overflow-policy', type=click.Choice([e.value for e in OverflowPolicy]),
+              default=os.environ.get("OVERFLOW_POLICY", OverflowPolicy.Reject.value),
+              help="Reject new readings, drop the oldest queued ones or block the senders when the queue is full")
+@click.option('--lease-ttl', type=float, default=os.environ.get("LEASE_TTL", DEFAULT_LEASE_TTL),
+              help="Drop the registrations not renewed by a heartbeat for this many seconds (0 never drops them)")
 async def main(
         log_level: str,
         port: int,
+        batch_size: int,
+        batch_linger: int,
+        strategy: str,
+        max_queue_size: int,
+        max_in_flight: int,
+        overflow_policy: str,
+        lease_ttl: float,
+        timeout: Optional[float] = None,
         debug: bool = False,
 ):
     setup_logger(log_level=logging.DEBUG if debug else log_level.upper())
@@ -44,18 +74,27 @@ async def main(
     logger.info("Creating services")
 
     # Create RegistrationService
-    registration_service = RegistrationService(parent_service="LoadBalancer")
+    registration_service = RegistrationService(parent_service="LoadBalancer", lease_ttl=lease_ttl or None)
 
     # Create load balancer
-    load_balancer = LoadBalancer(registration_service)
+    load_balancer = LoadBalancer(
+        registration_service,
+        create_strategy(LoadBalancingStrategyType(strategy)),
+        batch_size=batch_size,
+        batch_linger=batch_linger,
+        timeout=timeout,
+    )
 
     # Create MeteoService
     meteo_service = MeteoService(load_balancer, registration_service)
 
+    # Create the admission queue of the readings to forward
+    admission_queue = AdmissionQueue(max_queue_size, max_in_flight, OverflowPolicy(overflow_policy))
+
     # Register the MeteoService
     logger.info("Registering MeteoServiceServicer")
     meteo_service_pb2_grpc.add_MeteoServiceServicer_to_server(
-        MeteoServiceServicer(meteo_service),
+        MeteoServiceServicer(meteo_service, admission_queue),
         server
     )
 
@@ -74,10 +113,19 @@ async def main(
     logger.info("gRPC server started successfully")
     logger.info(f"Listening on port {port}")
 
+    # expire the registrations of the servers that stopped sending heartbeats
+    registration_service.run()
+
     async def _cleanup():
         logger.info("Cleaning up")
+        logger.info("Stopping registration lease expiry")
+        await registration_service.close()
         logger.info("Shutting down gRPC server")
         await server.stop(5)
+        logger.info("Forwarding queued readings")
+        await admission_queue.close()
+        logger.info("Flushing buffered readings and closing channels")
+        await load_balancer.close()
 
     _cleanup_coroutines.append(_cleanup())
 
@@ -1,9 +1,12 @@
-import asyncio
 import logging
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
+import grpc
 from google.protobuf.empty_pb2 import Empty
 from grpc import ServicerContext
 
+from admission_queue import AdmissionQueue
 from meteo_service import MeteoService
 from proto.messages.meteo.meteo_messages_pb2 import RawMeteoData, RawPollutionData
 from proto.services.meteo import meteo_service_pb2_grpc
@@ -12,21 +15,51 @@ logger = logging.getLogger(__name__)
 
 
 class MeteoServiceServicer(meteo_service_pb2_grpc.MeteoServiceServicer):
-    def __init__(self, meteo_service: MeteoService):
+    """
+    Readings are forwarded through a bounded admission queue. Calls and streams are aborted with
+    RESOURCE_EXHAUSTED when the queue rejects a reading.
+    """
+
+    def __init__(self, meteo_service: MeteoService, admission_queue: Optional[AdmissionQueue] = None):
         logger.info("Initializing MeteoServiceServicer")
         self._meteo_service = meteo_service
-        self._background_tasks = set()
+        self._admission_queue = admission_queue or AdmissionQueue()
 
     async def SendMeteoData(self, meteo_data: RawMeteoData, context: ServicerContext) -> Empty:
         logger.info(f"{context.peer()} called SendMeteoData")
-        task = asyncio.create_task(self._meteo_service.send_meteo_data(meteo_data))
-        self._background_tasks.add(task)
-        task.add_done_callback(self._background_tasks.discard)
+        await self._admit(partial(self._meteo_service.send_meteo_data, meteo_data), context)
         return Empty()
 
     async def SendPollutionData(self, pollution_data: RawPollutionData, context: ServicerContext) -> Empty:
         logger.info(f"{context.peer()} called SendPollutionData")
-        task = asyncio.create_task(self._meteo_service.send_pollution_data(pollution_data))
-        self._background_tasks.add(task)
-        task.add_done_callback(self._background_tasks.discard)
+        await self._admit(partial(self._meteo_service.send_pollution_data, pollution_data), context)
+        return Empty()
+
+    async def StreamMeteoData(
+            self,
+            meteo_data_iterator: AsyncIterator[RawMeteoData],
+            context: ServicerContext
+    ) -> Empty:
+        logger.info(f"{context.peer()} called StreamMeteoData")
+        async for meteo_data in meteo_data_iterator:
+            logger.debug(f"{context.peer()} streamed meteo data")
+            await self._admit(partial(self._meteo_service.send_meteo_data, meteo_data), context)
+        logger.info(f"{context.peer()} closed StreamMeteoData")
         return Empty()
+
+    async def StreamPollutionData(
+            self,
+            pollution_data_iterator: AsyncIterator[RawPollutionData],
+            context: ServicerContext
+    ) -> Empty:
+        logger.info(f"{context.peer()} called StreamPollutionData")
+        async for pollution_data in pollution_data_iterator:
+            logger.debug(f"{context.peer()} streamed pollution data")
+            await self._admit(partial(self._meteo_service.send_pollution_data, pollution_data), context)
+        logger.info(f"{context.peer()} closed StreamPollutionData")
+        return Empty()
+
+    async def _admit(self, job: Callable[[], Awaitable], context: ServicerContext):
+        if not await self._admission_queue.put(job):
+            logger.warning(f"Rejecting data from {context.peer()}: {self._admission_queue}")
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Too many pending readings")
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from common.registration_service import Address
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+DEFAULT_BATCH_LINGER = 50
+
+
+class MicroBatcher(Generic[T]):
+    """
+    Buffers items per backend address and flushes each buffer when it reaches max_batch_size items
+    or max_linger ms after its first item was added, whichever comes first.
+    Each item gets a future that is resolved once its batch was sent (or failed), so callers can wait for it and
+    the number of batches being sent stays bounded by the number of callers waiting.
+    """
+
+    def __init__(
+            self,
+            flush: Callable[[Address, List[T]], Awaitable[None]],
+            max_batch_size: int,
+            max_linger: int = DEFAULT_BATCH_LINGER,
+    ):
+        self._flush = flush
+        self._max_batch_size = max_batch_size
+        self._max_linger = max_linger
+        self._buffers: Dict[Address, List[Tuple[T, asyncio.Future]]] = {}
+        self._timers: Dict[Address, asyncio.TimerHandle] = {}
+        self._background_tasks = set()
+
+    def add(self, address: Address, item: T, future: Optional[asyncio.Future] = None) -> asyncio.Future:
+        """
+        Buffers an item, with the future of a discarded item when it is added again.
+        :return: the future resolved once the batch of the item was sent.
+        """
+        future = future or asyncio.get_running_loop().create_future()
+        buffer = self._buffers.setdefault(address, [])
+        buffer.append((item, future))
+        if len(buffer) >= self._max_batch_size:
+            self.flush(address)
+        elif address not in self._timers:
+            self._timers[address] = asyncio.get_running_loop().call_later(
+                self._max_linger / 1000, self.flush, address
+            )
+        return future
+
+    def flush(self, address: Address):
+        timer = self._timers.pop(address, None)
+        if timer:
+            timer.cancel()
+        entries = self._buffers.pop(address, None)
+        if not entries:
+            return
+        task = asyncio.create_task(self._send(address, entries))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def discard(self, address: Address) -> List[Tuple[T, asyncio.Future]]:
+        """
+        Removes the buffer of an address without sending it.
+        :return: the items that were buffered for the address, with their futures.
+        """
+        timer = self._timers.pop(address, None)
+        if timer:
+            timer.cancel()
+        return self._buffers.pop(address, [])
+
+    async def close(self):
+        """
+        Flushes all the buffers and waits for the pending batches to be sent.
+        """
+        for address in list(self._buffers):
+            self.flush(address)
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    async def _send(self, address: Address, entries: List[Tuple[T, asyncio.Future]]):
+        logger.debug(f"{self} flushing batch of {len(entries)} items to {address}")
+        try:
+            await self._flush(address, [item for item, _ in entries])
+        except Exception as e:
+            logger.error(f"{self} failed to send batch of {len(entries)} items to {address}: {e}")
+            for _, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in entries:
+                if not future.done():
+                    future.set_result(None)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_batch_size={self._max_batch_size}, max_linger={self._max_linger})"
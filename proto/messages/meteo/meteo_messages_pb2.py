@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n)proto/messages/meteo/meteo_messages.proto\x12\x05meteo\x1a\x1fgoogle/protobuf/timestamp.proto\"d\n\x0cRawMeteoData\x12\x13\n\x0btemperature\x18\x01 \x01(\x02\x12\x10\n\x08humidity\x18\x02 \x01(\x02\x12-\n\ttimestamp\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"N\n\x10RawPollutionData\x12\x0b\n\x03\x63o2\x18\x01 \x01(\x02\x12-\n\ttimestamp\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.Timestampb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n)proto/messages/meteo/meteo_messages.proto\x12\x05meteo\x1a\x1fgoogle/protobuf/timestamp.proto\"d\n\x0cRawMeteoData\x12\x13\n\x0btemperature\x18\x01 \x01(\x02\x12\x10\n\x08humidity\x18\x02 \x01(\x02\x12-\n\ttimestamp\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"N\n\x10RawPollutionData\x12\x0b\n\x03\x63o2\x18\x01 \x01(\x02\x12-\n\ttimestamp\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"6\n\x11RawMeteoDataBatch\x12!\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x13.meteo.RawMeteoData\">\n\x15RawPollutionDataBatch\x12%\n\x04\x64\x61ta\x18\x01 \x03(\x0b\x32\x17.meteo.RawPollutionDatab\x06proto3')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'proto.messages.meteo.meteo_messages_pb2', globals())
@@ -25,4 +25,8 @@ if _descriptor._USE_C_DESCRIPTORS == False:
   _RAWMETEODATA._serialized_end=185
   _RAWPOLLUTIONDATA._serialized_start=187
   _RAWPOLLUTIONDATA._serialized_end=265
+  _RAWMETEODATABATCH._serialized_start=267
+  _RAWMETEODATABATCH._serialized_end=321
+  _RAWPOLLUTIONDATABATCH._serialized_start=323
+  _RAWPOLLUTIONDATABATCH._serialized_end=385
 # @@protoc_insertion_point(module_scope)
@@ -1,7 +1,8 @@
 from google.protobuf import timestamp_pb2 as _timestamp_pb2
+from google.protobuf.internal import containers as _containers
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
-from typing import ClassVar as _ClassVar, Mapping as _Mapping, Optional as _Optional, Union as _Union
+from typing import ClassVar as _ClassVar, Iterable as _Iterable, Mapping as _Mapping, Optional as _Optional, Union as _Union
 
 DESCRIPTOR: _descriptor.FileDescriptor
 
@@ -15,6 +16,12 @@ class RawMeteoData(_message.Message):
     timestamp: _timestamp_pb2.Timestamp
     def __init__(self, temperature: _Optional[float] = ..., humidity: _Optional[float] = ..., timestamp: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ...) -> None: ...
 
+class RawMeteoDataBatch(_message.Message):
+    __slots__ = ["data"]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    data: _containers.RepeatedCompositeFieldContainer[RawMeteoData]
+    def __init__(self, data: _Optional[_Iterable[_Union[RawMeteoData, _Mapping]]] = ...) -> None: ...
+
 class RawPollutionData(_message.Message):
     __slots__ = ["co2", "timestamp"]
     CO2_FIELD_NUMBER: _ClassVar[int]
@@ -22,3 +29,9 @@ class RawPollutionData(_message.Message):
     co2: float
     timestamp: _timestamp_pb2.Timestamp
     def __init__(self, co2: _Optional[float] = ..., timestamp: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ...) -> None: ...
+
+class RawPollutionDataBatch(_message.Message):
+    __slots__ = ["data"]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    data: _containers.RepeatedCompositeFieldContainer[RawPollutionData]
+    def __init__(self, data: _Optional[_Iterable[_Union[RawPollutionData, _Mapping]]] = ...) -> None: ...
@@ -26,6 +26,16 @@ class MeteoServiceStub(object):
                 request_serializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionData.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 )
+        self.StreamMeteoData = channel.stream_unary(
+                '/meteo.MeteoService/StreamMeteoData',
+                request_serializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawMeteoData.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                )
+        self.StreamPollutionData = channel.stream_unary(
+                '/meteo.MeteoService/StreamPollutionData',
+                request_serializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionData.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                )
 
 
 class MeteoServiceServicer(object):
@@ -46,6 +56,20 @@ class MeteoServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamMeteoData(self, request_iterator, context):
+        """Send a stream of meteorological data to the server
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamPollutionData(self, request_iterator, context):
+        """Send a stream of pollution data to the server
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MeteoServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -59,6 +83,16 @@ def add_MeteoServiceServicer_to_server(servicer, server):
                     request_deserializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionData.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
+            'StreamMeteoData': grpc.stream_unary_rpc_method_handler(
+                    servicer.StreamMeteoData,
+                    request_deserializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawMeteoData.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'StreamPollutionData': grpc.stream_unary_rpc_method_handler(
+                    servicer.StreamPollutionData,
+                    request_deserializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionData.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'meteo.MeteoService', rpc_method_handlers)
@@ -103,3 +137,37 @@ class MeteoService(object):
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamMeteoData(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/meteo.MeteoService/StreamMeteoData',
+            proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawMeteoData.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamPollutionData(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/meteo.MeteoService/StreamPollutionData',
+            proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionData.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -15,7 +15,7 @@ from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 from proto.messages.meteo import meteo_messages_pb2 as proto_dot_messages_dot_meteo_dot_meteo__messages__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n2proto/services/processing/processing_service.proto\x12\x05meteo\x1a\x1bgoogle/protobuf/empty.proto\x1a)proto/messages/meteo/meteo_messages.proto2\x9d\x01\n\x11ProcessingService\x12?\n\x10ProcessMeteoData\x12\x13.meteo.RawMeteoData\x1a\x16.google.protobuf.Empty\x12G\n\x14ProcessPollutionData\x12\x17.meteo.RawPollutionData\x1a\x16.google.protobuf.Emptyb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n2proto/services/processing/processing_service.proto\x12\x05meteo\x1a\x1bgoogle/protobuf/empty.proto\x1a)proto/messages/meteo/meteo_messages.proto2\xbb\x02\n\x11ProcessingService\x12?\n\x10ProcessMeteoData\x12\x13.meteo.RawMeteoData\x1a\x16.google.protobuf.Empty\x12G\n\x14ProcessPollutionData\x12\x17.meteo.RawPollutionData\x1a\x16.google.protobuf.Empty\x12I\n\x15ProcessMeteoDataBatch\x12\x18.meteo.RawMeteoDataBatch\x1a\x16.google.protobuf.Empty\x12Q\n\x19ProcessPollutionDataBatch\x12\x1c.meteo.RawPollutionDataBatch\x1a\x16.google.protobuf.Emptyb\x06proto3')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'proto.services.processing.processing_service_pb2', globals())
@@ -23,5 +23,5 @@ if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
   _PROCESSINGSERVICE._serialized_start=134
-  _PROCESSINGSERVICE._serialized_end=291
+  _PROCESSINGSERVICE._serialized_end=449
 # @@protoc_insertion_point(module_scope)
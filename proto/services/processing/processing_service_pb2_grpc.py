@@ -26,6 +26,16 @@ class ProcessingServiceStub(object):
                 request_serializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionData.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 )
+        self.ProcessMeteoDataBatch = channel.unary_unary(
+                '/meteo.ProcessingService/ProcessMeteoDataBatch',
+                request_serializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawMeteoDataBatch.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                )
+        self.ProcessPollutionDataBatch = channel.unary_unary(
+                '/meteo.ProcessingService/ProcessPollutionDataBatch',
+                request_serializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionDataBatch.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                )
 
 
 class ProcessingServiceServicer(object):
@@ -46,6 +56,20 @@ class ProcessingServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ProcessMeteoDataBatch(self, request, context):
+        """Process a batch of meteorological data
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ProcessPollutionDataBatch(self, request, context):
+        """Process a batch of pollution data
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ProcessingServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -59,6 +83,16 @@ def add_ProcessingServiceServicer_to_server(servicer, server):
                     request_deserializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionData.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
+            'ProcessMeteoDataBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ProcessMeteoDataBatch,
+                    request_deserializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawMeteoDataBatch.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'ProcessPollutionDataBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ProcessPollutionDataBatch,
+                    request_deserializer=proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionDataBatch.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'meteo.ProcessingService', rpc_method_handlers)
@@ -103,3 +137,37 @@ class ProcessingService(object):
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ProcessMeteoDataBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/meteo.ProcessingService/ProcessMeteoDataBatch',
+            proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawMeteoDataBatch.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ProcessPollutionDataBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/meteo.ProcessingService/ProcessPollutionDataBatch',
+            proto_dot_messages_dot_meteo_dot_meteo__messages__pb2.RawPollutionDataBatch.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -5,6 +5,12 @@ from typing import ClassVar as _ClassVar, Optional as _Optional
 
 DESCRIPTOR: _descriptor.FileDescriptor
 
+class HeartbeatResponse(_message.Message):
+    __slots__ = ["registered"]
+    REGISTERED_FIELD_NUMBER: _ClassVar[int]
+    registered: bool
+    def __init__(self, registered: bool = ...) -> None: ...
+
 class RegisterRequest(_message.Message):
     __slots__ = ["additional_info", "address", "port", "uid"]
     ADDITIONAL_INFO_FIELD_NUMBER: _ClassVar[int]
@@ -26,6 +26,11 @@ class RegistrationServiceStub(object):
                 request_serializer=proto_dot_services_dot_registration_dot_registration__service__pb2.UID.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 )
+        self.Heartbeat = channel.unary_unary(
+                '/registration.RegistrationService/Heartbeat',
+                request_serializer=proto_dot_services_dot_registration_dot_registration__service__pb2.UID.SerializeToString,
+                response_deserializer=proto_dot_services_dot_registration_dot_registration__service__pb2.HeartbeatResponse.FromString,
+                )
 
 
 class RegistrationServiceServicer(object):
@@ -46,6 +51,13 @@ class RegistrationServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Heartbeat(self, request, context):
+        """Renew the lease of the registration of a server or terminal
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_RegistrationServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -59,6 +71,11 @@ def add_RegistrationServiceServicer_to_server(servicer, server):
                     request_deserializer=proto_dot_services_dot_registration_dot_registration__service__pb2.UID.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
+            'Heartbeat': grpc.unary_unary_rpc_method_handler(
+                    servicer.Heartbeat,
+                    request_deserializer=proto_dot_services_dot_registration_dot_registration__service__pb2.UID.FromString,
+                    response_serializer=proto_dot_services_dot_registration_dot_registration__service__pb2.HeartbeatResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'registration.RegistrationService', rpc_method_handlers)
@@ -103,3 +120,20 @@ class RegistrationService(object):
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Heartbeat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/registration.RegistrationService/Heartbeat',
+            proto_dot_services_dot_registration_dot_registration__service__pb2.UID.SerializeToString,
+            proto_dot_services_dot_registration_dot_registration__service__pb2.HeartbeatResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -17,3 +17,11 @@ class Results(_message.Message):
     wellness_data: float
     wellness_timestamp: _timestamp_pb2.Timestamp
     def __init__(self, wellness_data: _Optional[float] = ..., wellness_timestamp: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ..., pollution_data: _Optional[float] = ..., pollution_timestamp: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ...) -> None: ...
+
+class SubscribeRequest(_message.Message):
+    __slots__ = ["interval", "uid"]
+    INTERVAL_FIELD_NUMBER: _ClassVar[int]
+    UID_FIELD_NUMBER: _ClassVar[int]
+    interval: int
+    uid: str
+    def __init__(self, uid: _Optional[str] = ..., interval: _Optional[int] = ...) -> None: ...
@@ -69,3 +69,68 @@ class TerminalService(object):
             google_dot_protobuf_dot_empty__pb2.Empty.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+
+class SubscriptionServiceStub(object):
+    """SubscriptionService is the service that is used by terminals to receive the processed data from the proxy
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Subscribe = channel.unary_stream(
+                '/terminal.SubscriptionService/Subscribe',
+                request_serializer=proto_dot_services_dot_terminal_dot_terminal__service__pb2.SubscribeRequest.SerializeToString,
+                response_deserializer=proto_dot_services_dot_terminal_dot_terminal__service__pb2.Results.FromString,
+                )
+
+
+class SubscriptionServiceServicer(object):
+    """SubscriptionService is the service that is used by terminals to receive the processed data from the proxy
+    """
+
+    def Subscribe(self, request, context):
+        """Stream the processed data of the tumbling windows of the requested interval
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_SubscriptionServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.Subscribe,
+                    request_deserializer=proto_dot_services_dot_terminal_dot_terminal__service__pb2.SubscribeRequest.FromString,
+                    response_serializer=proto_dot_services_dot_terminal_dot_terminal__service__pb2.Results.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'terminal.SubscriptionService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class SubscriptionService(object):
+    """SubscriptionService is the service that is used by terminals to receive the processed data from the proxy
+    """
+
+    @staticmethod
+    def Subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/terminal.SubscriptionService/Subscribe',
+            proto_dot_services_dot_terminal_dot_terminal__service__pb2.SubscribeRequest.SerializeToString,
+            proto_dot_services_dot_terminal_dot_terminal__service__pb2.Results.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -9,10 +9,14 @@ import grpc.aio
 import redis.asyncio as redis
 
 from common.log import setup_logger, LOGGER_LEVEL_CHOICES
-from common.registration_service import RegistrationService
+from common.registration_service import RegistrationService, DEFAULT_LEASE_TTL
 from common.registration_service_servicer import RegistrationServiceServicer
+from common.store_strategy import StoreType, create_store_strategy, DEFAULT_BUCKET_RESOLUTION, DEFAULT_PARTITION_SIZE
 from proto.services.registration import registration_service_pb2_grpc
-from proxy.tumbling_window import TumblingWindow
+from proto.services.terminal import terminal_service_pb2_grpc
+from proxy.subscription_service_servicer import SubscriptionServiceServicer
+from proxy.subscriber import DEFAULT_SEND_TIMEOUT, DEFAULT_SUBSCRIBER_QUEUE_SIZE, DEFAULT_MAX_SEND_FAILURES
+from proxy.tumbling_window import TumblingWindow, DEFAULT_MIN_TICK
 
 logger = logging.getLogger(__name__)
 
@@ -30,10 +34,37 @@ _cleanup_coroutines = []
               default=os.environ.get('LOG_LEVEL', 'info'), help="Set the log level")
 @click.option('--port', type=int, help="Set the port", default=os.environ.get("PORT", DEFAULT_PORT))
 @click.option('--interval', type=int, help="Set the default tumbling window interval in ms")
+@click.option('--min-tick', type=int, default=os.environ.get("MIN_TICK", DEFAULT_MIN_TICK),
+              help="Round the requested intervals to multiples of this many ms (the minimum redis query period)")
+@click.option('--store-type', type=click.Choice([e.value for e in StoreType]),
+              default=os.environ.get("STORE_TYPE", StoreType.SortedSet.value),
+              help="Set how the results are stored in redis (must match the one of the servers)")
+@click.option('--bucket-resolution', type=int, default=os.environ.get("BUCKET_RESOLUTION", DEFAULT_BUCKET_RESOLUTION),
+              help="Set the size in ms of the time buckets of the bucketed store")
+@click.option('--partition-size', type=int, default=os.environ.get("PARTITION_SIZE", DEFAULT_PARTITION_SIZE),
+              help="Set the size in ms of the time partitions of the partitioned sorted set store")
+@click.option('--send-timeout', type=float, default=os.environ.get("SEND_TIMEOUT", DEFAULT_SEND_TIMEOUT),
+              help="Set the timeout in seconds of sending results to a terminal")
+@click.option('--subscriber-queue-size', type=int,
+              default=os.environ.get("SUBSCRIBER_QUEUE_SIZE", DEFAULT_SUBSCRIBER_QUEUE_SIZE),
+              help="Set the number of results queued for a terminal before the oldest are dropped")
+@click.option('--max-send-failures', type=int,
+              default=os.environ.get("MAX_SEND_FAILURES", DEFAULT_MAX_SEND_FAILURES),
+              help="Disconnect a terminal after this many consecutive failed sends")
+@click.option('--lease-ttl', type=float, default=os.environ.get("LEASE_TTL", DEFAULT_LEASE_TTL),
+              help="Drop the registrations not renewed by a heartbeat for this many seconds (0 never drops them)")
 async def main(
         redis_address: str,
         log_level: str,
         port: int,
+        store_type: str,
+        min_tick: int,
+        bucket_resolution: int,
+        partition_size: int,
+        send_timeout: float,
+        subscriber_queue_size: int,
+        max_send_failures: int,
+        lease_ttl: float,
         debug: bool = False,
         interval: Optional[int] = None,
 ):
@@ -48,7 +79,7 @@ async def main(
     logger.info("Creating services")
 
     # Create RegistrationService
-    registration_service = RegistrationService(parent_service="Proxy")
+    registration_service = RegistrationService(parent_service="Proxy", lease_ttl=lease_ttl or None)
 
     # Register the RegistrationService
     logger.info("Registering RegistrationServiceServicer")
@@ -58,7 +89,29 @@ async def main(
     )
 
     # Create the tumbling window
-    tumbling_window = TumblingWindow(registration_service, redis.from_url(redis_address, db=0), interval)
+    redis_client = redis.from_url(redis_address, db=0)
+    tumbling_window = TumblingWindow(
+        registration_service,
+        redis_client,
+        interval,
+        store_strategy=create_store_strategy(
+            StoreType(store_type),
+            redis_client,
+            bucket_resolution,
+            partition_size=partition_size,
+        ),
+        send_timeout=send_timeout,
+        subscriber_queue_size=subscriber_queue_size,
+        max_send_failures=max_send_failures,
+        min_tick=min_tick,
+    )
+
+    # Register the SubscriptionService
+    logger.info("Registering SubscriptionServiceServicer")
+    terminal_service_pb2_grpc.add_SubscriptionServiceServicer_to_server(
+        SubscriptionServiceServicer(tumbling_window, subscriber_queue_size),
+        server
+    )
 
     # Listen on port 50050
     logger.info("Starting gRPC server")
@@ -68,8 +121,16 @@ async def main(
     logger.info("gRPC server started successfully")
     logger.info(f"Listening on port {port}")
 
+    # expire the registrations of the terminals that stopped sending heartbeats
+    registration_service.run()
+
     async def _cleanup():
         logger.info("Cleaning up")
+        logger.info("Stopping registration lease expiry")
+        await registration_service.close()
+        # ends the subscription streams first, so the server does not wait for them
+        logger.info("Stopping tumbling windows")
+        await tumbling_window.close()
         logger.info("Shutting down gRPC server")
         await server.stop(5)
 
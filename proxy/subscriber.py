@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Hashable, Optional
+
+import grpc.aio
+
+from common.registration_service import Address
+from proto.services.terminal.terminal_service_pb2 import Results
+from proto.services.terminal.terminal_service_pb2_grpc import TerminalServiceStub
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEND_TIMEOUT = 1
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 10
+DEFAULT_MAX_SEND_FAILURES = 5
+
+
+class Subscriber(ABC):
+    """
+    A terminal receiving the results of a tumbling window. Results are queued in a bounded queue and delivered in
+    order independently of the other terminals. When the queue is full, the oldest queued result is dropped.
+    """
+
+    def __init__(self, max_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        self._queue: asyncio.Queue[Optional[Results]] = asyncio.Queue(max_queue_size)
+        self._dropped = 0
+
+    @property
+    @abstractmethod
+    def key(self) -> Hashable:
+        """
+        Identifies the terminal among the subscribers of an interval.
+        """
+        pass
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def send(self, results: Optional[Results]):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._dropped += 1
+            logger.debug(f"{self} is too slow, dropped oldest results")
+        self._queue.put_nowait(results)
+
+    @abstractmethod
+    async def close(self):
+        pass
+
+
+class PushSubscriber(Subscriber):
+    """
+    A registered terminal the results are pushed to with SendResults calls, by a task of its own.
+    A terminal failing max_failures consecutive sends (e.g. not answering within timeout seconds) is disconnected:
+    its queue is discarded, its channel closed and on_disconnect called with it.
+    """
+
+    def __init__(
+            self,
+            address: Address,
+            timeout: float = DEFAULT_SEND_TIMEOUT,
+            max_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE,
+            max_failures: int = DEFAULT_MAX_SEND_FAILURES,
+            on_disconnect: Optional[Callable[["PushSubscriber"], None]] = None,
+    ):
+        super().__init__(max_queue_size)
+        self._address = address
+        self._timeout = timeout
+        self._max_failures = max_failures
+        self._on_disconnect = on_disconnect
+        self._channel = grpc.aio.insecure_channel(f"{address.address}:{address.port}")
+        self._stub = TerminalServiceStub(self._channel)
+        self._failures = 0
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def key(self) -> Address:
+        return self._address
+
+    @property
+    def address(self) -> Address:
+        return self._address
+
+    def send(self, results: Results):
+        if not self._task.done():
+            super().send(results)
+
+    async def close(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self._channel.close()
+
+    async def _run(self):
+        while True:
+            results = await self._queue.get()
+            try:
+                await self._stub.SendResults(results, timeout=self._timeout)
+                self._failures = 0
+            except grpc.aio.AioRpcError as e:
+                self._failures += 1
+                logger.debug(f"Failed to send results to {self}: {e.code()}")
+                if self._failures >= self._max_failures:
+                    logger.warning(f"Disconnecting {self} after {self._failures} consecutive failures")
+                    break
+        # drop the pending results, the channel is closed by close
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        if self._on_disconnect:
+            self._on_disconnect(self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._address}, queued={self._queue.qsize()}, dropped={self._dropped})"
+
+
+class StreamSubscriber(Subscriber):
+    """
+    A terminal subscribed through the SubscriptionService, that reads its results from a stream.
+    """
+
+    def __init__(self, uid: str, max_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        super().__init__(max_queue_size)
+        self._uid = uid
+        self._closed = False
+
+    @property
+    def key(self) -> str:
+        return self._uid
+
+    def send(self, results: Results):
+        if not self._closed:
+            super().send(results)
+
+    async def close(self):
+        # ends the stream once the queued results are read
+        if not self._closed:
+            self._closed = True
+            super().send(None)
+
+    async def __aiter__(self) -> AsyncIterator[Results]:
+        while (results := await self._queue.get()) is not None:
+            yield results
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._uid}, queued={self._queue.qsize()}, dropped={self._dropped})"
@@ -0,0 +1,31 @@
+import logging
+from typing import AsyncIterator
+
+from grpc import ServicerContext
+
+from common.log import format_proto_msg
+from proto.services.terminal import terminal_service_pb2_grpc
+from proto.services.terminal.terminal_service_pb2 import SubscribeRequest, Results
+from proxy.subscriber import StreamSubscriber, DEFAULT_SUBSCRIBER_QUEUE_SIZE
+from proxy.tumbling_window import TumblingWindow
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionServiceServicer(terminal_service_pb2_grpc.SubscriptionServiceServicer):
+    def __init__(self, tumbling_window: TumblingWindow, max_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        logger.info("Initializing SubscriptionServiceServicer")
+        self._tumbling_window = tumbling_window
+        self._max_queue_size = max_queue_size
+
+    async def Subscribe(self, req: SubscribeRequest, context: ServicerContext) -> AsyncIterator[Results]:
+        logger.info(f"Received subscribe request {format_proto_msg(req)} from {context.peer()}")
+        subscriber = StreamSubscriber(req.uid or context.peer(), self._max_queue_size)
+        # an unset interval (0) gets the default one
+        interval = self._tumbling_window.subscribe(req.interval, subscriber)
+        try:
+            async for results in subscriber:
+                yield results
+        finally:
+            # the terminal cancelled the call or the proxy is shutting down
+            self._tumbling_window.unsubscribe(interval, subscriber)
@@ -1,121 +1,252 @@
 import asyncio
 import logging
+import math
 import time
-from asyncio import Task
-from typing import Tuple, Optional, Dict, List
+from functools import partial
+from typing import Optional, Dict, NamedTuple, Hashable
 
-import grpc.aio
-from grpc.aio import Channel
 from redis.asyncio import Redis
 
 from common.observer import Observer
-from common.registration_service import RegistrationService, Address
-from common.store_strategy import StoreStrategy, SortedSetStoreStrategy
+from common.registration_service import RegistrationService
+from common.store_strategy import StoreStrategy, SortedSetStoreStrategy, Aggregate
 from proto.services.terminal.terminal_service_pb2 import Results
-from proto.services.terminal.terminal_service_pb2_grpc import TerminalServiceStub
+from proxy.subscriber import Subscriber, PushSubscriber, DEFAULT_SEND_TIMEOUT, DEFAULT_SUBSCRIBER_QUEUE_SIZE, \
+    DEFAULT_MAX_SEND_FAILURES
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_WINDOW_INTERVAL = 2000
 STARTUP_DELAY = 5
+# Minimum tick in ms, intervals are rounded to multiples of it so their greatest common divisor is never lower
+DEFAULT_MIN_TICK = 100
+# Maximum number of missed ticks computed when the tumbling windows fall behind, older ones are skipped
+MAX_CATCH_UP_TICKS = 10
+
+
+class PartialWindow(NamedTuple):
+    """
+    The aggregates of the ticks of a window computed so far, covering from its start (in ms) to end.
+    """
+    start: int
+    end: int
+    wellness: Aggregate = Aggregate()
+    pollution: Aggregate = Aggregate()
 
 
 class TumblingWindow(Observer):
+    """
+    Computes the results of the tumbling windows of each interval requested by the terminals and sends them to
+    the terminals of the interval: the registered ones, and those subscribed with subscribe (see Subscriber).
+    Redis is only queried once per tick, the greatest common divisor of the intervals, and the windows of each
+    interval are made by merging the aggregates of their ticks. Windows are aligned to multiples of their interval
+    since the epoch, and only those covered by ticks from their start are sent.
+    Requested intervals are rounded to multiples of min_tick (and of the resolution of the store), so the tick never
+    gets lower, and the default interval is used for non-positive ones.
+    """
+
     def __init__(
             self,
             registration_service: RegistrationService,
             redis: Redis,
             default_window_interval: Optional[int] = None,
             store_strategy: Optional[StoreStrategy] = None,
+            send_timeout: float = DEFAULT_SEND_TIMEOUT,
+            subscriber_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE,
+            max_send_failures: int = DEFAULT_MAX_SEND_FAILURES,
+            min_tick: int = DEFAULT_MIN_TICK,
     ):
         logger.info(f"Creating TumblingWindow with window interval {default_window_interval}")
         self._registration_service = registration_service
-        self._default_window_interval = default_window_interval or DEFAULT_WINDOW_INTERVAL
         self._store = store_strategy or SortedSetStoreStrategy(redis)
-        self._addresses: List[Address] = []
-        self._channels: Dict[int, Dict[str, Channel]] = {}
-        self._coroutines: Dict[int, Task] = {}
+        # ticks must also be made of whole buckets of the store, for their aggregates to be merged
+        self._min_tick = math.lcm(min_tick, self._store.resolution)
+        self._default_window_interval = self._round_interval(default_window_interval or DEFAULT_WINDOW_INTERVAL)
+        self._send_timeout = send_timeout
+        self._subscriber_queue_size = subscriber_queue_size
+        self._max_send_failures = max_send_failures
+        self._subscribers: Dict[int, Dict[Hashable, Subscriber]] = {self._default_window_interval: {}}
+        self._tick = self._default_window_interval
+        self._partials: Dict[int, PartialWindow] = {}
+        self._lags: Dict[int, float] = {}
+        self._background_tasks = set()
         self._registration_service.attach(self)
-        # create default coroutine
-        self._coroutines[self._default_window_interval] = asyncio.create_task(
-            self._run(self._default_window_interval)
-        )
-        self._channels[self._default_window_interval] = {}
+        self._task = asyncio.create_task(self._run())
 
     def update(self, subject: RegistrationService):
         addresses = list(subject.get_addresses())
-        logger.debug(f"LoadBalancer received update from {subject} with addresses {addresses}")
-
-        # remove channels and coroutines for addresses that are no longer registered
-        for interval, channels in self._channels.items():
-            for address in self._addresses:
-                if address not in addresses:
-                    logger.debug(f"Removing channel for {address}")
-                    del channels[address.address]
-            if not channels and interval is not self._default_window_interval:
-                logger.debug(f"Removing coroutine for interval {interval}")
-                self._coroutines[interval].cancel()
-                del self._coroutines[interval]
+        logger.debug(f"TumblingWindow received update from {subject} with addresses {addresses}")
+
+        # remove subscribers that are no longer registered and the intervals left without them
+        for interval, subscribers in list(self._subscribers.items()):
+            for key, subscriber in list(subscribers.items()):
+                if isinstance(subscriber, PushSubscriber) and key not in addresses:
+                    logger.debug(f"Removing subscriber for {key}")
+                    self._close_subscriber(subscribers.pop(key))
+            self._remove_interval_if_unused(interval)
 
         # get the intervals requested by the terminals from the address additional info
         # those with no interval requested will get the default interval
         for address in addresses:
             try:
-                interval = int(address.additional_info)
+                interval = self._valid_interval(int(address.additional_info))
             except (TypeError, ValueError):
                 interval = self._default_window_interval
-            if interval not in self._channels:
-                self._channels[interval] = {}
-            if address.address not in self._channels[interval]:
-                self._channels[interval][address.address] = grpc.aio.insecure_channel(
-                    f"{address.address}:{address.port}"
+            subscribers = self._subscribers.setdefault(interval, {})
+            if address not in subscribers:
+                subscribers[address] = PushSubscriber(
+                    address,
+                    self._send_timeout,
+                    self._subscriber_queue_size,
+                    self._max_send_failures,
+                    on_disconnect=partial(self._on_disconnect, interval),
                 )
 
-        # create a coroutine for each interval if it doesn't exist
-        for interval, channels in self._channels.items():
-            if interval not in self._coroutines:
-                self._coroutines[interval] = asyncio.create_task(self._run(interval))
+        self._update_tick()
+
+    @property
+    def default_window_interval(self) -> int:
+        return self._default_window_interval
 
-        self._addresses = addresses
+    def subscribe(self, interval: int, subscriber: Subscriber) -> int:
+        """
+        :return: the interval the subscriber was subscribed to, to unsubscribe it.
+        """
+        interval = self._valid_interval(interval)
+        logger.info(f"Subscribing {subscriber} to interval {interval}")
+        self._subscribers.setdefault(interval, {})[subscriber.key] = subscriber
+        self._update_tick()
+        return interval
 
-    async def _run(self, interval: int):
-        logger.debug(f"Starting tumbling window for interval {interval}")
-        background_tasks = set()
-        last_time = time.time()
+    def unsubscribe(self, interval: int, subscriber: Subscriber):
+        logger.info(f"Unsubscribing {subscriber} from interval {interval}")
+        subscribers = self._subscribers.get(interval, {})
+        if subscribers.get(subscriber.key) is subscriber:
+            del subscribers[subscriber.key]
+        self._close_subscriber(subscriber)
+        self._remove_interval_if_unused(interval)
+        self._update_tick()
+
+    async def close(self):
+        self._registration_service.detach(self)
+        self._task.cancel()
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers.values():
+                self._close_subscriber(subscriber)
+        await asyncio.gather(self._task, *self._background_tasks, return_exceptions=True)
+
+    @property
+    def lags(self) -> Dict[int, float]:
+        """
+        Delay in seconds between the end of the last window of each interval and its computation.
+        """
+        return dict(self._lags)
+
+    async def _run(self):
+        logger.debug("Starting tumbling windows")
         await asyncio.sleep(STARTUP_DELAY)
+        # ticks are aligned to multiples of the tick since the epoch and their bounds are in integer ms computed
+        # from the wall clock, instead of accumulating the time spent sleeping and computing them.
+        # As the tick divides every interval, window bounds are always tick bounds, also when the tick changes
+        start = math.floor(time.time() * 1000 / self._tick) * self._tick
         while True:
-            await asyncio.sleep(interval / 1000)
-            end = last_time + interval / 1000
-            assert end <= time.time()
-            logger.debug(f"Running tumbling window from {last_time} to {end}")
-            results = Results()
-            (wellness_data, wellness_timestamp), (pollution_data, pollution_timestamp) = await asyncio.gather(
-                self._get_data("wellness", last_time, end),
-                self._get_data("pollution", last_time, end),
-            )
-            results.wellness_data = wellness_data
-            results.wellness_timestamp.FromNanoseconds(int(wellness_timestamp * 1e9))
-            results.pollution_data = pollution_data
-            results.pollution_timestamp.FromNanoseconds(int(pollution_timestamp * 1e9))
-            last_time = end
-            task = asyncio.create_task(self._send_results(results, interval))
-            background_tasks.add(task)
-            task.add_done_callback(background_tasks.discard)
-
-    async def _send_results(self, results: Results, interval: int):
+            end = (start // self._tick + 1) * self._tick
+            while (delay := end / 1000 - time.time()) > 0:
+                await asyncio.sleep(delay)
+            lag = time.time() - end / 1000
+            missed = int(lag * 1000 // self._tick)
+            if missed > MAX_CATCH_UP_TICKS:
+                logger.warning(f"Tumbling windows are {lag:.3f}s behind, skipping {missed - MAX_CATCH_UP_TICKS} ticks")
+                start = end + (missed - MAX_CATCH_UP_TICKS - 1) * self._tick
+                continue
+            if missed:
+                # every tick computed later than a tick length, with the lags of the last windows of each interval
+                logger.warning(f"Tumbling windows are {lag:.3f}s behind, catching up {missed} ticks "
+                               f"(window lags: {self._format_lags()})")
+            logger.debug(f"Running tumbling window tick from {start} to {end} with lag {lag:.3f}s")
+            try:
+                wellness, pollution = await asyncio.gather(
+                    self._store.aggregate("wellness", start / 1000, end / 1000),
+                    self._store.aggregate("pollution", start / 1000, end / 1000),
+                )
+                self._merge_tick(start, end, wellness, pollution, lag)
+            except Exception as e:
+                # only the windows spanning this tick are lost (skipped as incomplete), not the following ones
+                logger.exception(f"Failed to compute tumbling window tick from {start} to {end}: {e}")
+            start = end
+
+    def _merge_tick(self, start: int, end: int, wellness: Aggregate, pollution: Aggregate, lag: float):
+        for interval in list(self._subscribers):
+            window = self._partials.get(interval)
+            if not window or window.start != start // interval * interval:
+                window = PartialWindow(start // interval * interval, start)
+            if window.end == start:
+                window = PartialWindow(window.start, end, window.wellness.merge(wellness),
+                                       window.pollution.merge(pollution))
+            if end % interval:
+                self._partials[interval] = window
+                continue
+            self._partials.pop(interval, None)
+            if window.end - window.start != interval:
+                logger.debug(f"Skipping incomplete window of interval {interval} from {window.start} to {end}")
+                continue
+            self._lags[interval] = lag
+            self._send_results(self._to_results(window), interval)
+
+    @staticmethod
+    def _to_results(window: PartialWindow) -> Results:
+        logger.debug(f"Computed window {window}")
+        results = Results()
+        if window.wellness.count:
+            results.wellness_data = window.wellness.mean
+            results.wellness_timestamp.FromNanoseconds(int(window.wellness.last_timestamp * 1e9))
+        if window.pollution.count:
+            results.pollution_data = window.pollution.mean
+            results.pollution_timestamp.FromNanoseconds(int(window.pollution.last_timestamp * 1e9))
+        return results
+
+    def _send_results(self, results: Results, interval: int):
+        # only queues the results, each subscriber sends them on its own
         logger.debug(f"Sending results to terminals with interval {interval}")
-        for address, channel in self._channels[interval].items():
-            logger.debug(f"Sending results to {address}")
-            stub = TerminalServiceStub(channel)
-            await stub.SendResults(results)
-
-    async def _get_data(self, key: str, start: float, end: float) -> Tuple[float, float]:
-        res = await self._store.get(key, start, end)
-        logger.debug(f"Got data from redis for key {key}: {res}")
-        # returns a lis of tuples (key, score) where key is the value and score is the timestamp
-        if not res or len(res) == 0:
-            return 0, 0
-        last_time = max(res, key=lambda x: x[1])[1]
-        mean = sum([float(x[0]) for x in res]) / len(res)
-        logger.debug(f"Computed mean {mean} for key {key} from {start} to {end} with last time {last_time}")
-        return mean, last_time
+        for subscriber in self._subscribers.get(interval, {}).values():
+            subscriber.send(results)
+
+    def _on_disconnect(self, interval: int, subscriber: PushSubscriber):
+        self.unsubscribe(interval, subscriber)
+        # its next heartbeat finds it unregistered, so a terminal that recovers registers and is subscribed again
+        task = asyncio.create_task(self._registration_service.unregister_address(subscriber.key))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _remove_interval_if_unused(self, interval: int):
+        if not self._subscribers.get(interval) and interval != self._default_window_interval:
+            logger.debug(f"Removing interval {interval}")
+            self._subscribers.pop(interval, None)
+            self._partials.pop(interval, None)
+            self._lags.pop(interval, None)
+
+    def _format_lags(self) -> str:
+        return ", ".join(f"{interval} ms: {lag:.3f}s" for interval, lag in sorted(self._lags.items()))
+
+    def _valid_interval(self, interval: int) -> int:
+        if interval <= 0:
+            logger.warning(f"Invalid interval {interval}, using the default interval {self._default_window_interval}")
+            return self._default_window_interval
+        return self._round_interval(interval)
+
+    def _round_interval(self, interval: int) -> int:
+        rounded = max(round(interval / self._min_tick), 1) * self._min_tick
+        if rounded != interval:
+            logger.warning(f"Interval {interval} is not a multiple of {self._min_tick} ms, rounded to {rounded}")
+        return rounded
+
+    def _update_tick(self):
+        tick = math.gcd(*self._subscribers)
+        if tick != self._tick:
+            logger.info(f"Computing tumbling windows of intervals {list(self._subscribers)} with tick {tick}")
+            self._tick = tick
+
+    def _close_subscriber(self, subscriber: Subscriber):
+        task = asyncio.create_task(subscriber.close())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
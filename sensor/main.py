@@ -29,13 +29,16 @@ _cleanup_coroutines = []
 @click.option('--sensor-type', type=click.Choice([e.value for e in SensorType]),
               default=os.environ.get("SENSOR_TYPE", random.choice(list(SensorType)).value), help="Set the sensor type")
 @click.option('--interval', type=int, default=os.environ.get("INTERVAL"), help="Set the sensor interval in ms")
+@click.option('--stream', is_flag=True, default=os.environ.get("STREAM", "").lower() in ("1", "true"),
+              help="Send the readings through one long-lived stream instead of one call per reading")
 async def main(
         meteo_service_address: str,
         sensor_id: str,
         sensor_type: str,
         debug: bool = False,
         log_level: str = 'info',
-        interval: Optional[int] = None
+        interval: Optional[int] = None,
+        stream: bool = False
 ):
     setup_logger(log_level=logging.DEBUG if debug else log_level.upper())
 
@@ -46,7 +49,7 @@ async def main(
 
     meteo = MeteoServiceStub(grpc.aio.insecure_channel(meteo_service_address))
 
-    sensor = create_sensor(sensor_id, MeteoDataDetector(), meteo, SensorType(sensor_type), interval)
+    sensor = create_sensor(sensor_id, MeteoDataDetector(), meteo, SensorType(sensor_type), interval, stream)
 
     logger.info("Starting sensor loop")
 
@@ -6,7 +6,7 @@ import random
 import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Optional
+from typing import Optional, AsyncIterator
 
 from common.log import format_proto_msg
 from common.meteo_utils import MeteoDataDetector
@@ -16,6 +16,8 @@ from proto.services.meteo.meteo_service_pb2_grpc import MeteoServiceStub
 logger = logging.getLogger(__name__)
 
 DEFAULT_INTERVAL = 1000
+# Maximum number of readings waiting to be sent through the stream
+MAX_STREAM_BACKLOG = 100
 
 
 class SensorType(Enum):
@@ -30,7 +32,8 @@ class Sensor(ABC):
             sensor_type: SensorType,
             detector: MeteoDataDetector,
             meteo: MeteoServiceStub,
-            interval: Optional[int] = None
+            interval: Optional[int] = None,
+            stream: bool = False
     ):
         if not sensor_id:
             raise ValueError("Sensor id must be provided")
@@ -39,6 +42,7 @@ class Sensor(ABC):
         self._detector = detector
         self._meteo = meteo
         self._interval = interval or DEFAULT_INTERVAL
+        self._stream = stream
 
     @property
     def sensor_id(self) -> str:
@@ -56,7 +60,14 @@ class Sensor(ABC):
     async def send_data(self, data: RawMeteoData | RawPollutionData):
         pass
 
+    @abstractmethod
+    async def stream_data(self, data: AsyncIterator[RawMeteoData | RawPollutionData]):
+        pass
+
     async def run(self):
+        if self._stream:
+            await self._run_stream()
+            return
         background_tasks = set()
         while True:
             await asyncio.sleep(self._interval / 1000)
@@ -65,8 +76,37 @@ class Sensor(ABC):
             background_tasks.add(task)
             task.add_done_callback(background_tasks.discard)
 
+    async def _run_stream(self):
+        # readings are queued and sent through one long-lived stream, which is reopened if it fails
+        queue: asyncio.Queue[RawMeteoData | RawPollutionData] = asyncio.Queue(maxsize=MAX_STREAM_BACKLOG)
+        task = asyncio.create_task(self._keep_stream(queue))
+        try:
+            while True:
+                await asyncio.sleep(self._interval / 1000)
+                data = self.get_data()
+                try:
+                    queue.put_nowait(data)
+                except asyncio.QueueFull:
+                    logger.warning(f"{self} stream backlog is full, dropping {format_proto_msg(data)}")
+        finally:
+            task.cancel()
+
+    async def _keep_stream(self, queue: asyncio.Queue[RawMeteoData | RawPollutionData]):
+        async def _iter_queue():
+            while True:
+                yield await queue.get()
+
+        while True:
+            logger.info(f"{self} opening stream to meteo service")
+            try:
+                await self.stream_data(_iter_queue())
+                logger.warning(f"{self} stream to meteo service closed")
+            except Exception as e:
+                logger.error(f"{self} stream to meteo service failed: {e}")
+            await asyncio.sleep(self._interval / 1000)
+
     def __repr__(self):
-        return f"{self._sensor_type}(id={self._sensor_id}, interval={self._interval})"
+        return f"{self._sensor_type}(id={self._sensor_id}, interval={self._interval}, stream={self._stream})"
 
 
 class AirQualitySensor(Sensor):
@@ -75,9 +115,10 @@ class AirQualitySensor(Sensor):
             sensor_id: str,
             detector: MeteoDataDetector,
             meteo: MeteoServiceStub,
-            interval: Optional[int] = None
+            interval: Optional[int] = None,
+            stream: bool = False
     ):
-        super().__init__(sensor_id, SensorType.AirQuality, detector, meteo, interval)
+        super().__init__(sensor_id, SensorType.AirQuality, detector, meteo, interval, stream)
         logger.info(f"Initializing {self}")
 
     def get_data(self) -> RawMeteoData:
@@ -97,6 +138,10 @@ class AirQualitySensor(Sensor):
         except Exception as e:
             logger.error(f"{self} failed to send meteo data {format_proto_msg(data)} to meteo service: {e}")
 
+    async def stream_data(self, data: AsyncIterator[RawMeteoData]):
+        logger.info(f"{self} calling StreamMeteoData")
+        await self._meteo.StreamMeteoData(data)
+
 
 class PollutionSensor(Sensor):
     def __init__(
@@ -104,9 +149,10 @@ class PollutionSensor(Sensor):
             sensor_id: str,
             detector: MeteoDataDetector,
             meteo: MeteoServiceStub,
-            interval: Optional[int] = None
+            interval: Optional[int] = None,
+            stream: bool = False
     ):
-        super().__init__(sensor_id, SensorType.Pollution, detector, meteo, interval)
+        super().__init__(sensor_id, SensorType.Pollution, detector, meteo, interval, stream)
         logger.info(f"Initializing {self}")
 
     def get_data(self) -> RawPollutionData:
@@ -125,17 +171,22 @@ class PollutionSensor(Sensor):
         except Exception as e:
             logger.error(f"{self} failed to send pollution data {format_proto_msg(data)} to meteo service: {e}")
 
+    async def stream_data(self, data: AsyncIterator[RawPollutionData]):
+        logger.info(f"{self} calling StreamPollutionData")
+        await self._meteo.StreamPollutionData(data)
+
 
 def create_sensor(
         sensor_id: str,
         detector: MeteoDataDetector,
         meteo: MeteoServiceStub,
         sensor_type: Optional[SensorType] = random.choice(list(SensorType)),
-        interval: Optional[int] = None
+        interval: Optional[int] = None,
+        stream: bool = False
 ) -> Sensor:
     if sensor_type == SensorType.AirQuality:
-        return AirQualitySensor(sensor_id, detector, meteo, interval)
+        return AirQualitySensor(sensor_id, detector, meteo, interval, stream)
     elif sensor_type == SensorType.Pollution:
-        return PollutionSensor(sensor_id, detector, meteo, interval)
+        return PollutionSensor(sensor_id, detector, meteo, interval, stream)
     else:
         raise ValueError(f"Invalid sensor type {sensor_type}")
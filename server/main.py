@@ -11,10 +11,14 @@ import grpc.aio
 import redis.asyncio as redis
 
 from common.log import setup_logger, LOGGER_LEVEL_CHOICES
-from common.meteo_utils import MeteoDataProcessor
+from common.meteo_utils import MeteoDataProcessor, DEFAULT_RESOLUTION, LatencyMode, load_tables
+from common.registration_client import RegistrationClient
+from common.registration_service import DEFAULT_HEARTBEAT_INTERVAL
+from common.store_strategy import BufferedStoreStrategy, DEFAULT_STORE_FLUSH_INTERVAL, StoreType, \
+    create_store_strategy, DEFAULT_BUCKET_RESOLUTION, DEFAULT_PARTITION_SIZE, DEFAULT_TRIM_INTERVAL, MemberEncoding
 from proto.services.processing import processing_service_pb2_grpc
-from proto.services.registration.registration_service_pb2 import RegisterRequest, UID
-from proto.services.registration.registration_service_pb2_grpc import RegistrationServiceStub
+from proto.services.registration.registration_service_pb2 import RegisterRequest
+from server.processing_executor import ExecutorType, create_executor
 from server.processing_service import ProcessingService
 from server.processing_service_servicer import ProcessingServiceServicer
 
@@ -36,11 +40,65 @@ _cleanup_coroutines = []
 @click.option('--log-level', type=click.Choice(LOGGER_LEVEL_CHOICES),
               default=os.environ.get('LOG_LEVEL', 'info'), help="Set the log level")
 @click.option('--port', type=int, help="Set the port", default=os.environ.get("PORT", DEFAULT_PORT))
+@click.option('--resolution', type=int, default=os.environ.get("RESOLUTION", DEFAULT_RESOLUTION),
+              help="Set the resolution of the wellness lookup tables")
+@click.option('--exact/--no-exact', default=True,
+              help="Resolve lookups exactly like the original distribution search (default) or to the nearest value")
+@click.option('--lookup-tables', type=click.Path(dir_okay=False), default=os.environ.get("LOOKUP_TABLES"),
+              help="Load the wellness lookup tables from this file (they are built and saved to it if missing)")
+@click.option('--executor', type=click.Choice([e.value for e in ExecutorType]),
+              default=os.environ.get("EXECUTOR", ExecutorType.Thread.value),
+              help="Set where the wellness computation runs (thread pool, process pool or inline in the event loop)")
+@click.option('--workers', type=int, default=os.environ.get("WORKERS"),
+              help="Set the number of thread/process pool workers (defaults to the number of cores for processes)")
+@click.option('--chunk-size', type=int, default=os.environ.get("CHUNK_SIZE"),
+              help="Set the number of readings of each chunk of a batch submitted to the process pool")
+@click.option('--latency-mode', type=click.Choice([e.value for e in LatencyMode]),
+              default=os.environ.get("LATENCY_MODE", LatencyMode.Blocking.value),
+              help="Simulate the processing time by sleeping in the executor, awaiting a delay or not at all")
+@click.option('--store-type', type=click.Choice([e.value for e in StoreType]),
+              default=os.environ.get("STORE_TYPE", StoreType.SortedSet.value),
+              help="Set how the results are stored in redis (raw samples or pre-aggregated time buckets)")
+@click.option('--bucket-resolution', type=int, default=os.environ.get("BUCKET_RESOLUTION", DEFAULT_BUCKET_RESOLUTION),
+              help="Set the size in ms of the time buckets of the bucketed store")
+@click.option('--partition-size', type=int, default=os.environ.get("PARTITION_SIZE", DEFAULT_PARTITION_SIZE),
+              help="Set the size in ms of the time partitions of the partitioned sorted set store")
+@click.option('--member-encoding', type=click.Choice([e.value for e in MemberEncoding]),
+              default=os.environ.get("MEMBER_ENCODING", MemberEncoding.Text.value),
+              help="Store the results in sorted sets as text or packed binary members (both are always read)")
+@click.option('--retention', type=int, default=os.environ.get("RETENTION"),
+              help="Keep the results for this many ms (they are kept forever by default)")
+@click.option('--trim-interval', type=int, default=os.environ.get("TRIM_INTERVAL", DEFAULT_TRIM_INTERVAL),
+              help="Set the minimum time in ms between two trims of the expired results of a sorted set")
+@click.option('--store-batch-size', type=int, default=os.environ.get("STORE_BATCH_SIZE", 1),
+              help="Write the results to redis in batches of up to this size (1 disables batching)")
+@click.option('--store-flush-interval', type=int,
+              default=os.environ.get("STORE_FLUSH_INTERVAL", DEFAULT_STORE_FLUSH_INTERVAL),
+              help="Set the maximum time in ms a result waits for its batch to fill")
+@click.option('--heartbeat-interval', type=float,
+              default=os.environ.get("HEARTBEAT_INTERVAL", DEFAULT_HEARTBEAT_INTERVAL),
+              help="Set the time in seconds between two renewals of the registration (below the lease TTL)")
 async def main(
         load_balancer_address: str,
         redis_address: str,
         port: int,
         log_level: str,
+        resolution: int,
+        executor: str,
+        latency_mode: str,
+        store_type: str,
+        bucket_resolution: int,
+        partition_size: int,
+        member_encoding: str,
+        trim_interval: int,
+        store_batch_size: int,
+        store_flush_interval: int,
+        heartbeat_interval: float,
+        exact: bool = True,
+        lookup_tables: Optional[str] = None,
+        retention: Optional[int] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
         self_address: Optional[str] = None,
         debug: bool = False,
 ):
@@ -57,9 +115,13 @@ async def main(
     # register with load balancer
     logger.info("Registering with load balancer")
 
-    registration = RegistrationServiceStub(grpc.insecure_channel(load_balancer_address))
     uid = uuid.uuid4().hex
-    registration.Register(RegisterRequest(uid=uid, address=self_address, port=int(port)))
+    registration = RegistrationClient(
+        load_balancer_address,
+        RegisterRequest(uid=uid, address=self_address, port=int(port)),
+        heartbeat_interval,
+    )
+    await registration.register()
 
     # Create a gRPC server
     logger.info("Creating gRPC server")
@@ -68,15 +130,43 @@ async def main(
 
     logger.info("Creating services")
 
+    # Create MeteoDataProcessor
+    if lookup_tables and os.path.exists(lookup_tables):
+        logger.info(f"Loading wellness lookup tables from {lookup_tables}")
+        processor = MeteoDataProcessor(tables=load_tables(lookup_tables), latency_mode=LatencyMode(latency_mode))
+    else:
+        logger.info(f"Building wellness lookup tables with resolution {resolution}")
+        processor = MeteoDataProcessor(resolution=resolution, exact=exact, latency_mode=LatencyMode(latency_mode))
+        if lookup_tables:
+            logger.info(f"Saving wellness lookup tables to {lookup_tables}")
+            processor.save_tables(lookup_tables)
+
+    # Create the store strategy
+    redis_client = redis.from_url(redis_address, db=0)
+    store_strategy = create_store_strategy(
+        StoreType(store_type),
+        redis_client,
+        bucket_resolution,
+        retention,
+        trim_interval,
+        partition_size,
+        MemberEncoding(member_encoding),
+    )
+    if store_batch_size > 1:
+        store_strategy = BufferedStoreStrategy(store_strategy, store_batch_size, store_flush_interval)
+
     # Create ProcessingService
-    processing_service = ProcessingService(MeteoDataProcessor(), redis.from_url(redis_address, db=0))
+    processing_service = ProcessingService(
+        processor,
+        redis_client,
+        store_strategy=store_strategy,
+        executor=create_executor(ExecutorType(executor), processor, workers, chunk_size),
+    )
 
     # Register the ProcessingService
     logger.info("Registering ProcessingServiceServicer")
-    processing_service_pb2_grpc.add_ProcessingServiceServicer_to_server(
-        ProcessingServiceServicer(processing_service),
-        server
-    )
+    processing_service_servicer = ProcessingServiceServicer(processing_service)
+    processing_service_pb2_grpc.add_ProcessingServiceServicer_to_server(processing_service_servicer, server)
 
     # Listen on port
     logger.info("Starting gRPC server")
@@ -89,9 +179,13 @@ async def main(
     async def _cleanup():
         logger.info("Cleaning up")
         logger.info("Unregistering from load balancer")
-        registration.Unregister(UID(uid=uid))
+        await registration.unregister()
         logger.info("Shutting down gRPC server")
         await server.stop(5)
+        logger.info("Waiting for the processing of cancelled calls")
+        await processing_service_servicer.close()
+        logger.info("Flushing pending writes and shutting down executor")
+        await processing_service.close()
 
     _cleanup_coroutines.append(_cleanup())
 
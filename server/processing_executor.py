@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from typing import Optional, Sequence
+
+import numpy
+
+from common.meteo_utils import MeteoDataProcessor, LatencyMode
+from proto.messages.meteo.meteo_messages_pb2 import RawMeteoData, RawPollutionData
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256
+
+
+class ExecutorType(Enum):
+    Thread = 'thread'
+    Process = 'process'
+    Inline = 'inline'
+
+
+class ProcessingExecutor(ABC):
+    """
+    Runs the (CPU-bound) wellness computation of a MeteoDataProcessor for the ProcessingService.
+    """
+
+    @abstractmethod
+    async def process_meteo_data(self, meteo_data: RawMeteoData) -> float:
+        pass
+
+    @abstractmethod
+    async def process_pollution_data(self, pollution_data: RawPollutionData) -> float:
+        pass
+
+    @abstractmethod
+    async def process_meteo_batch(self, temperatures: Sequence[float], humidities: Sequence[float]) -> numpy.ndarray:
+        pass
+
+    @abstractmethod
+    async def process_pollution_batch(self, co2: Sequence[float]) -> numpy.ndarray:
+        pass
+
+    async def close(self):
+        pass
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+
+class InlineProcessingExecutor(ProcessingExecutor):
+    """
+    Runs the computation directly in the event loop.
+    """
+
+    def __init__(self, processor: MeteoDataProcessor):
+        self._processor = processor
+
+    async def process_meteo_data(self, meteo_data: RawMeteoData) -> float:
+        return self._processor.process_meteo_data(meteo_data)
+
+    async def process_pollution_data(self, pollution_data: RawPollutionData) -> float:
+        return self._processor.process_pollution_data(pollution_data)
+
+    async def process_meteo_batch(self, temperatures: Sequence[float], humidities: Sequence[float]) -> numpy.ndarray:
+        return self._processor.process_meteo_batch(temperatures, humidities)
+
+    async def process_pollution_batch(self, co2: Sequence[float]) -> numpy.ndarray:
+        return self._processor.process_pollution_batch(co2)
+
+
+class ThreadProcessingExecutor(ProcessingExecutor):
+    """
+    Runs the computation in a thread pool (the default executor of the event loop if no size is given).
+    """
+
+    def __init__(self, processor: MeteoDataProcessor, max_workers: Optional[int] = None):
+        self._processor = processor
+        self._max_workers = max_workers
+        self._pool: Optional[Executor] = ThreadPoolExecutor(max_workers) if max_workers else None
+
+    async def process_meteo_data(self, meteo_data: RawMeteoData) -> float:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._processor.process_meteo_data, meteo_data)
+
+    async def process_pollution_data(self, pollution_data: RawPollutionData) -> float:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._processor.process_pollution_data, pollution_data)
+
+    async def process_meteo_batch(self, temperatures: Sequence[float], humidities: Sequence[float]) -> numpy.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._processor.process_meteo_batch, temperatures, humidities)
+
+    async def process_pollution_batch(self, co2: Sequence[float]) -> numpy.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._processor.process_pollution_batch, co2)
+
+    async def close(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_workers={self._max_workers})"
+
+
+class ProcessProcessingExecutor(ProcessingExecutor):
+    """
+    Runs the computation in a pool of worker processes, each one holding its own MeteoDataProcessor.
+    Workers load the lookup tables of the given processor instead of rebuilding them.
+    Batches are split in chunks of chunk_size readings that are processed concurrently by the workers.
+    """
+
+    def __init__(
+            self,
+            processor: MeteoDataProcessor,
+            max_workers: Optional[int] = None,
+            chunk_size: Optional[int] = None,
+    ):
+        self._max_workers = max_workers or multiprocessing.cpu_count()
+        self._chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        # workers are spawned instead of forked, as forking a process running gRPC is not safe
+        self._pool = ProcessPoolExecutor(
+            self._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(processor.tables, processor.latency_mode),
+        )
+
+    async def process_meteo_data(self, meteo_data: RawMeteoData) -> float:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, _process_meteo_data, meteo_data)
+
+    async def process_pollution_data(self, pollution_data: RawPollutionData) -> float:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, _process_pollution_data, pollution_data)
+
+    async def process_meteo_batch(self, temperatures: Sequence[float], humidities: Sequence[float]) -> numpy.ndarray:
+        if len(temperatures) == 0:
+            return numpy.empty(0)
+        loop = asyncio.get_running_loop()
+        return numpy.concatenate(await asyncio.gather(*[
+            loop.run_in_executor(self._pool, _process_meteo_batch, temperatures[i:i + self._chunk_size],
+                                 humidities[i:i + self._chunk_size])
+            for i in range(0, len(temperatures), self._chunk_size)
+        ]))
+
+    async def process_pollution_batch(self, co2: Sequence[float]) -> numpy.ndarray:
+        if len(co2) == 0:
+            return numpy.empty(0)
+        loop = asyncio.get_running_loop()
+        return numpy.concatenate(await asyncio.gather(*[
+            loop.run_in_executor(self._pool, _process_pollution_batch, co2[i:i + self._chunk_size])
+            for i in range(0, len(co2), self._chunk_size)
+        ]))
+
+    async def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_workers={self._max_workers}, chunk_size={self._chunk_size})"
+
+
+def create_executor(
+        executor_type: ExecutorType,
+        processor: MeteoDataProcessor,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+) -> ProcessingExecutor:
+    if executor_type == ExecutorType.Thread:
+        return ThreadProcessingExecutor(processor, max_workers)
+    elif executor_type == ExecutorType.Process:
+        return ProcessProcessingExecutor(processor, max_workers, chunk_size)
+    elif executor_type == ExecutorType.Inline:
+        return InlineProcessingExecutor(processor)
+    else:
+        raise ValueError(f"Invalid executor type {executor_type}")
+
+
+# Processor of the current worker process
+_worker_processor: Optional[MeteoDataProcessor] = None
+
+
+def _init_worker(tables, latency_mode: LatencyMode):
+    global _worker_processor
+    _worker_processor = MeteoDataProcessor(tables=tables, latency_mode=latency_mode)
+
+
+def _process_meteo_data(meteo_data: RawMeteoData) -> float:
+    return _worker_processor.process_meteo_data(meteo_data)
+
+
+def _process_pollution_data(pollution_data: RawPollutionData) -> float:
+    return _worker_processor.process_pollution_data(pollution_data)
+
+
+def _process_meteo_batch(temperatures: Sequence[float], humidities: Sequence[float]) -> numpy.ndarray:
+    return _worker_processor.process_meteo_batch(temperatures, humidities)
+
+
+def _process_pollution_batch(co2: Sequence[float]) -> numpy.ndarray:
+    return _worker_processor.process_pollution_batch(co2)
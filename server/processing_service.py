@@ -1,6 +1,5 @@
-import asyncio
 import logging
-from typing import Optional
+from typing import Optional, Sequence
 
 from redis.asyncio import Redis
 
@@ -8,22 +7,29 @@ from common.log import format_proto_msg
 from common.meteo_utils import MeteoDataProcessor
 from common.store_strategy import StoreStrategy, SortedSetStoreStrategy
 from proto.messages.meteo.meteo_messages_pb2 import RawMeteoData, RawPollutionData
+from server.processing_executor import ProcessingExecutor, ThreadProcessingExecutor
 
 logger = logging.getLogger(__name__)
 
 
 class ProcessingService:
-    def __init__(self, processor: MeteoDataProcessor, redis: Redis, store_strategy: Optional[StoreStrategy] = None):
+    def __init__(
+            self,
+            processor: MeteoDataProcessor,
+            redis: Redis,
+            store_strategy: Optional[StoreStrategy] = None,
+            executor: Optional[ProcessingExecutor] = None,
+    ):
         logger.info("Initializing ProcessingService")
         self._processor = processor
         self._store = store_strategy or SortedSetStoreStrategy(redis)
+        self._executor = executor or ThreadProcessingExecutor(processor)
+        logger.info(f"Using executor {self._executor}")
 
     async def process_meteo_data(self, raw_meteo_data: RawMeteoData):
         logger.debug(f"Processing raw meteo data {format_proto_msg(raw_meteo_data)}")
-        loop = asyncio.get_running_loop()
-        # run blocking code in a thread pool
-        wellness_data = await loop.run_in_executor(None, self._processor.process_meteo_data, raw_meteo_data)
-        # wellness_data = await asyncio.to_thread(self._processor.process_meteo_data, raw_meteo_data)
+        wellness_data = await self._executor.process_meteo_data(raw_meteo_data)
+        await self._processor.simulate_execution_time_async()
         logger.debug(f"Obtained wellness data \"{wellness_data}\"")
         if await self._store.store("wellness", raw_meteo_data.timestamp.ToNanoseconds(), wellness_data):
             logger.debug(f"Stored wellness data in redis")
@@ -32,12 +38,45 @@ class ProcessingService:
 
     async def process_pollution_data(self, raw_pollution_data: RawPollutionData):
         logger.debug(f"Processing raw pollution data {format_proto_msg(raw_pollution_data)}")
-        loop = asyncio.get_running_loop()
-        # run blocking code in a thread pool
-        pollution_data = await loop.run_in_executor(None, self._processor.process_pollution_data, raw_pollution_data)
-        # pollution_data = await asyncio.to_thread(self._processor.process_pollution_data, raw_pollution_data)
+        pollution_data = await self._executor.process_pollution_data(raw_pollution_data)
+        await self._processor.simulate_execution_time_async()
         logger.debug(f"Obtained pollution data \"{pollution_data}\"")
         if await self._store.store("pollution", raw_pollution_data.timestamp.ToNanoseconds(), pollution_data):
             logger.debug(f"Stored pollution data in redis")
         else:
             logger.warning(f"Failed to store pollution data \"{pollution_data}\"")
+
+    async def process_meteo_batch(self, raw_meteo_data: Sequence[RawMeteoData]):
+        logger.debug(f"Processing batch of {len(raw_meteo_data)} raw meteo data")
+        if not raw_meteo_data:
+            return
+        temperatures = [data.temperature for data in raw_meteo_data]
+        humidities = [data.humidity for data in raw_meteo_data]
+        wellness_data = await self._executor.process_meteo_batch(temperatures, humidities)
+        await self._processor.simulate_execution_time_async(len(raw_meteo_data))
+        logger.debug(f"Obtained {len(wellness_data)} wellness data")
+        await self._store_batch("wellness", raw_meteo_data, wellness_data)
+
+    async def process_pollution_batch(self, raw_pollution_data: Sequence[RawPollutionData]):
+        logger.debug(f"Processing batch of {len(raw_pollution_data)} raw pollution data")
+        if not raw_pollution_data:
+            return
+        co2 = [data.co2 for data in raw_pollution_data]
+        pollution_data = await self._executor.process_pollution_batch(co2)
+        await self._processor.simulate_execution_time_async(len(raw_pollution_data))
+        logger.debug(f"Obtained {len(pollution_data)} pollution data")
+        await self._store_batch("pollution", raw_pollution_data, pollution_data)
+
+    async def close(self):
+        await self._store.close()
+        await self._executor.close()
+
+    async def _store_batch(self, key: str, raw_data: Sequence[RawMeteoData | RawPollutionData], values):
+        stored = await self._store.store_many(key, [
+            (data.timestamp.ToNanoseconds(), float(value)) for data, value in zip(raw_data, values)
+        ])
+        failed = len(stored) - sum(stored)
+        if failed:
+            logger.warning(f"Failed to store {failed} of {len(stored)} {key} data")
+        else:
+            logger.debug(f"Stored {len(stored)} {key} data in redis")
@@ -1,10 +1,12 @@
 import asyncio
 import logging
+from typing import Awaitable
 
 from google.protobuf.empty_pb2 import Empty
 from grpc import ServicerContext
 
-from proto.messages.meteo.meteo_messages_pb2 import RawMeteoData, RawPollutionData
+from proto.messages.meteo.meteo_messages_pb2 import RawMeteoData, RawPollutionData, RawMeteoDataBatch, \
+    RawPollutionDataBatch
 from proto.services.processing import processing_service_pb2_grpc
 from server.processing_service import ProcessingService
 
@@ -12,6 +14,12 @@ logger = logging.getLogger(__name__)
 
 
 class ProcessingServiceServicer(processing_service_pb2_grpc.ProcessingServiceServicer):
+    """
+    Calls complete once the data has been processed and stored, so that the load balancer
+    can track how busy each server is. The processing of accepted data is not cancelled with its call
+    (e.g. when its deadline is exceeded), so it is always stored.
+    """
+
     def __init__(self, processing_service: ProcessingService):
         logger.info("Initializing ProcessingServiceServicer")
         self._processing_service = processing_service
@@ -19,14 +27,38 @@ class ProcessingServiceServicer(processing_service_pb2_grpc.ProcessingServiceSer
 
     async def ProcessMeteoData(self, meteo_data: RawMeteoData, context: ServicerContext) -> Empty:
         logger.info(f"{context.peer()} called ProcessMeteoData")
-        task = asyncio.create_task(self._processing_service.process_meteo_data(meteo_data))
-        self._background_tasks.add(task)
-        task.add_done_callback(self._background_tasks.discard)
+        await self._process(self._processing_service.process_meteo_data(meteo_data))
         return Empty()
 
     async def ProcessPollutionData(self, pollution_data: RawPollutionData, context: ServicerContext) -> Empty:
         logger.info(f"{context.peer()} called ProcessPollutionData")
-        task = asyncio.create_task(self._processing_service.process_pollution_data(pollution_data))
-        self._background_tasks.add(task)
-        task.add_done_callback(self._background_tasks.discard)
+        await self._process(self._processing_service.process_pollution_data(pollution_data))
         return Empty()
+
+    async def ProcessMeteoDataBatch(self, batch: RawMeteoDataBatch, context: ServicerContext) -> Empty:
+        logger.info(f"{context.peer()} called ProcessMeteoDataBatch with {len(batch.data)} meteo data")
+        await self._process(self._processing_service.process_meteo_batch(list(batch.data)))
+        return Empty()
+
+    async def ProcessPollutionDataBatch(self, batch: RawPollutionDataBatch, context: ServicerContext) -> Empty:
+        logger.info(f"{context.peer()} called ProcessPollutionDataBatch with {len(batch.data)} pollution data")
+        await self._process(self._processing_service.process_pollution_batch(list(batch.data)))
+        return Empty()
+
+    async def close(self):
+        """
+        Waits for the processing of the data of cancelled calls.
+        """
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    async def _process(self, processing: Awaitable):
+        task = asyncio.create_task(processing)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_processed)
+        await asyncio.shield(task)
+
+    def _on_processed(self, task: asyncio.Task):
+        self._background_tasks.discard(task)
+        # the call may be gone, so failures are always logged here
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to process data: {task.exception()}")
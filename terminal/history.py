@@ -0,0 +1,81 @@
+from typing import Tuple
+
+import numpy
+
+from terminal.ring_buffer import RingBuffer
+
+DEFAULT_HISTORY_CAPACITY = 1024
+
+
+class HistoryBuffer:
+    """
+    Keeps all the (timestamp, value) pairs written to a ring buffer in numpy arrays that grow (doubling their
+    capacity) as needed. Timestamps are expected to be increasing.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY):
+        self._timestamps = numpy.empty(capacity, dtype=numpy.float64)
+        self._values = numpy.empty(capacity, dtype=numpy.float64)
+        self._size = 0
+        self._sequence = 0
+
+    @property
+    def timestamps(self) -> numpy.ndarray:
+        return self._timestamps[:self._size]
+
+    @property
+    def values(self) -> numpy.ndarray:
+        return self._values[:self._size]
+
+    def update(self, data: RingBuffer) -> bool:
+        """
+        Appends the pairs written to a ring buffer since the last update.
+        :return: whether there were new pairs.
+        """
+        self._sequence, timestamps, values = data.snapshot(since=self._sequence)
+        self.extend(timestamps, values)
+        return len(timestamps) > 0
+
+    def extend(self, timestamps: numpy.ndarray, values: numpy.ndarray):
+        size = self._size + len(timestamps)
+        if size > len(self._timestamps):
+            capacity = max(size, 2 * len(self._timestamps))
+            self._timestamps = numpy.resize(self._timestamps, capacity)
+            self._values = numpy.resize(self._values, capacity)
+        self._timestamps[self._size:size] = timestamps
+        self._values[self._size:size] = values
+        self._size = size
+
+    def decimate(self, start: float, end: float, buckets: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the pairs between two timestamps (and their neighbours, so lines reach the edges), decimated to
+        at most 2 * buckets pairs with min_max_decimate.
+        """
+        first = max(numpy.searchsorted(self.timestamps, start) - 1, 0)
+        last = numpy.searchsorted(self.timestamps, end, side='right') + 1
+        return min_max_decimate(self.timestamps[first:last], self.values[first:last], buckets)
+
+    def __len__(self):
+        return self._size
+
+
+def min_max_decimate(
+        timestamps: numpy.ndarray,
+        values: numpy.ndarray,
+        buckets: int,
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Splits the pairs in buckets of consecutive pairs and keeps the minimum and the maximum of each one, in their
+    order, plus the first and the last pairs. With a bucket per pixel, the decimated line looks like the whole one.
+    """
+    size = len(timestamps)
+    if size <= 2 * buckets:
+        return timestamps, values
+    bucket_size = -(-size // buckets)
+    # the last bucket may be incomplete, it is padded with its last value
+    rows = numpy.concatenate((values, numpy.full(-size % bucket_size, values[-1]))).reshape(-1, bucket_size)
+    offsets = numpy.arange(len(rows)) * bucket_size
+    # the first and the last pairs are kept, so the line spans the same time
+    indices = numpy.concatenate(([0, size - 1], rows.argmin(axis=1) + offsets, rows.argmax(axis=1) + offsets))
+    indices = numpy.unique(numpy.minimum(indices, size - 1))
+    return timestamps[indices], values[indices]
@@ -11,10 +11,13 @@ import asyncclick as click
 import grpc.aio
 
 from common.log import setup_logger, LOGGER_LEVEL_CHOICES
-from proto.services.registration.registration_service_pb2 import RegisterRequest, UID
-from proto.services.registration.registration_service_pb2_grpc import RegistrationServiceStub
+from common.registration_client import RegistrationClient
+from common.registration_service import DEFAULT_HEARTBEAT_INTERVAL
+from proto.services.registration.registration_service_pb2 import RegisterRequest
 from proto.services.terminal import terminal_service_pb2_grpc
-from terminal.terminal_service import TerminalService
+from terminal.recorder import ResultsRecorder, DEFAULT_FSYNC_INTERVAL
+from terminal.subscription_client import SubscriptionClient
+from terminal.terminal_service import TerminalService, DEFAULT_FPS
 from terminal.terminal_service_servicer import TerminalServiceServicer
 
 logger = logging.getLogger(__name__)
@@ -29,17 +32,40 @@ _cleanup_coroutines = []
 @click.argument('proxy-address', type=str, required=False,
                 default=os.environ.get("PROXY_ADDRESS"))
 @click.option('--self-address', type=str, help="Set the self address")
-@click.option('--interval', type=int, help="Request the specified update interval in ms")
+@click.option('--interval', type=click.IntRange(min=0, max=2 ** 32 - 1),
+              help="Request the specified update interval in ms")
 @click.option('--debug', is_flag=True, help="Enable debug logging")
 @click.option('--log-level', type=click.Choice(LOGGER_LEVEL_CHOICES),
               default=os.environ.get('LOG_LEVEL', 'info'), help="Set the log level")
 @click.option('--port', type=int, help="Set the port", default=os.environ.get("PORT", DEFAULT_PORT))
+@click.option('--fps', type=int, default=os.environ.get("FPS", DEFAULT_FPS),
+              help="Set the maximum number of redraws per second of the plot")
+@click.option('--history', is_flag=True, default=os.environ.get("HISTORY", "").lower() in ("1", "true"),
+              help="Plot all the received results (decimated to the plot width) instead of the last ones")
+@click.option('--record', type=click.Path(dir_okay=False), default=os.environ.get("RECORD"),
+              help="Append the received results to this file (fixed-width binary records)")
+@click.option('--fsync-interval', type=float, default=os.environ.get("FSYNC_INTERVAL", DEFAULT_FSYNC_INTERVAL),
+              help="Set the time in seconds between two syncs of the recorded results to disk")
+@click.option('--headless', is_flag=True, default=os.environ.get("HEADLESS", "").lower() in ("1", "true"),
+              help="Do not plot the results (e.g. to only record them)")
+@click.option('--subscribe', is_flag=True, default=os.environ.get("SUBSCRIBE", "").lower() in ("1", "true"),
+              help="Receive the results through a stream opened to the proxy instead of registering with it")
+@click.option('--heartbeat-interval', type=float,
+              default=os.environ.get("HEARTBEAT_INTERVAL", DEFAULT_HEARTBEAT_INTERVAL),
+              help="Set the time in seconds between two renewals of the registration (below the lease TTL)")
 async def main(
         proxy_address: str,
         log_level: str,
         port: int,
+        fps: int,
+        fsync_interval: float,
+        heartbeat_interval: float,
         interval: Optional[int] = None,
+        record: Optional[str] = None,
+        headless: bool = False,
+        history: bool = False,
         self_address: Optional[str] = None,
+        subscribe: bool = False,
         debug: bool = False,
 ):
     setup_logger(log_level=logging.DEBUG if debug else log_level.upper())
@@ -49,13 +75,39 @@ async def main(
 
     logger.info("Starting terminal")
 
+    uid = uuid.uuid4().hex
+
+    if subscribe:
+        logger.info("Subscribing to proxy server")
+        terminal_service = TerminalService(
+            fps=fps,
+            recorder=ResultsRecorder(record, fsync_interval) if record else None,
+            headless=headless,
+            history=history,
+        )
+        client = SubscriptionClient(terminal_service, proxy_address, uid, interval)
+
+        async def _close_client():
+            logger.info("Cleaning up")
+            logger.info("Closing subscription")
+            await client.close()
+            await terminal_service.close()
+
+        _cleanup_coroutines.append(_close_client())
+
+        terminal_service.run()
+
+        await client.run()
+        return
+
     # register with proxy
     logger.info("Registering with proxy server")
-    registration = RegistrationServiceStub(grpc.insecure_channel(proxy_address))
-    uid = uuid.uuid4().hex
-    registration.Register(RegisterRequest(
-        uid=uid, address=self_address, port=int(port), additional_info=str(interval)
-    ))
+    registration = RegistrationClient(
+        proxy_address,
+        RegisterRequest(uid=uid, address=self_address, port=int(port), additional_info=str(interval)),
+        heartbeat_interval,
+    )
+    await registration.register()
 
     # Create a gRPC server
     logger.info("Creating gRPC server")
@@ -64,7 +116,12 @@ async def main(
     logger.info("Creating services")
 
     # Create TerminalService
-    terminal_service = TerminalService()
+    terminal_service = TerminalService(
+        fps=fps,
+        recorder=ResultsRecorder(record, fsync_interval) if record else None,
+        headless=headless,
+        history=history,
+    )
 
     # Register the TerminalService
     logger.info("Registering TerminalServiceServicer")
@@ -84,9 +141,10 @@ async def main(
     async def _cleanup():
         logger.info("Cleaning up")
         logger.info("Unregistering from load balancer")
-        registration.Unregister(UID(uid=uid))
+        await registration.unregister()
         logger.info("Shutting down gRPC server")
         await server.stop(5)
+        await terminal_service.close()
 
     _cleanup_coroutines.append(_cleanup())
 
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import numpy
+
+from proto.services.terminal.terminal_service_pb2 import Results
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two syncs of the recorded results to disk
+DEFAULT_FSYNC_INTERVAL = 1
+
+# Fixed-width little-endian record of a result: the time it was received and the results, with the timestamps in ns
+RECORD_DTYPE = numpy.dtype([
+    ('received', '<f8'),
+    ('wellness_timestamp', '<i8'),
+    ('wellness_data', '<f8'),
+    ('pollution_timestamp', '<i8'),
+    ('pollution_data', '<f8'),
+])
+
+
+class ResultsRecorder:
+    """
+    Appends the received results as RECORD_DTYPE records to a file with no header, which can be read with
+    read_records. The file is synced to disk every fsync_interval seconds and when closed.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = DEFAULT_FSYNC_INTERVAL):
+        logger.info(f"Recording results to {path}")
+        self._path = path
+        self._fsync_interval = fsync_interval
+        self._file = open(path, 'ab')
+        self._record = numpy.zeros(1, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._sync: Optional[asyncio.Future] = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def write(self, results: Results, received: float):
+        record = self._record[0]
+        record['received'] = received
+        record['wellness_timestamp'] = results.wellness_timestamp.ToNanoseconds()
+        record['wellness_data'] = results.wellness_data
+        record['pollution_timestamp'] = results.pollution_timestamp.ToNanoseconds()
+        record['pollution_data'] = results.pollution_data
+        self._file.write(self._record.tobytes())
+        self._count += 1
+
+    def run(self):
+        self._task = asyncio.create_task(self._sync_periodically())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        # an fsync still running in the executor must not outlive the file descriptor
+        if self._sync:
+            await asyncio.gather(self._sync, return_exceptions=True)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        logger.info(f"Recorded {self._count} results to {self._path}")
+
+    async def _sync_periodically(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self._fsync_interval)
+            # the buffered records are handed to the OS here, only the (slow) sync runs outside the event loop
+            self._file.flush()
+            self._sync = loop.run_in_executor(None, os.fsync, self._file.fileno())
+            # shielded, so cancelling the task does not drop the future close waits for
+            await asyncio.shield(self._sync)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self._path}, count={self._count})"
+
+
+def read_records(path: str) -> numpy.ndarray:
+    """
+    Maps the records of a file written by a ResultsRecorder, ignoring an incomplete last record.
+    """
+    count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if not count:
+        return numpy.zeros(0, dtype=RECORD_DTYPE)
+    return numpy.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
@@ -0,0 +1,73 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional, Tuple
+
+import numpy
+
+
+class RingBuffer:
+    """
+    A fixed-size ring buffer of (timestamp, value) pairs in shared memory, written by a single process and read by
+    others without locks. The buffer is created when no name is given, and attached to otherwise.
+    Layout: an int64 sequence counter (the number of pairs ever written), followed by capacity + 1 float64
+    timestamps and capacity + 1 float64 values. The extra slot is the one being written, so readers always get the
+    last capacity pairs.
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        self._capacity = capacity
+        self._slots = capacity + 1
+        self._owner = name is None
+        self._shm = SharedMemory(name=name, create=self._owner, size=8 + 16 * self._slots)
+        self._sequence = numpy.ndarray((1,), dtype=numpy.int64, buffer=self._shm.buf)
+        self._timestamps = numpy.ndarray((self._slots,), dtype=numpy.float64, buffer=self._shm.buf, offset=8)
+        self._values = numpy.ndarray((self._slots,), dtype=numpy.float64, buffer=self._shm.buf,
+                                     offset=8 + 8 * self._slots)
+        if self._owner:
+            self._sequence[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def sequence(self) -> int:
+        return int(self._sequence[0])
+
+    def append(self, timestamp: float, value: float):
+        sequence = self._sequence[0]
+        index = sequence % self._slots
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        # published once written, so readers never see a half-written pair
+        self._sequence[0] = sequence + 1
+
+    def snapshot(self, since: int = 0) -> Tuple[int, numpy.ndarray, numpy.ndarray]:
+        """
+        Copies the pairs in the buffer written since a value of the sequence counter, oldest first.
+        Pairs overwritten by the writer while copying are left out.
+        :return: the sequence counter and the timestamps and values of the pairs.
+        """
+        start = self.sequence
+        timestamps, values = self._timestamps.copy(), self._values.copy()
+        end = self.sequence
+        # pairs written while copying (and the one being written) may have overwritten the oldest ones
+        first = max(since, end - self._capacity)
+        indices = numpy.arange(first, start) % self._slots
+        return start, timestamps[indices], values[indices]
+
+    def close(self):
+        # the views must be released before the shared memory is closed
+        del self._sequence, self._timestamps, self._values
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __len__(self):
+        return min(self.sequence, self._capacity)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name}, capacity={self._capacity}, sequence={self.sequence})"
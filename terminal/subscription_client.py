@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import Optional
+
+import grpc.aio
+
+from proto.services.terminal.terminal_service_pb2 import SubscribeRequest
+from proto.services.terminal.terminal_service_pb2_grpc import SubscriptionServiceStub
+from terminal.terminal_service import TerminalService
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before opening the subscription stream again when it fails
+RECONNECT_DELAY = 1
+
+
+class SubscriptionClient:
+    """
+    Receives the results from the proxy through a long-lived Subscribe stream, instead of registering with it and
+    serving its SendResults calls, so the terminal does not need to be reachable by the proxy.
+    """
+
+    def __init__(
+            self,
+            terminal_service: TerminalService,
+            proxy_address: str,
+            uid: str,
+            interval: Optional[int] = None,
+    ):
+        logger.info(f"Initializing SubscriptionClient to {proxy_address} with interval {interval}")
+        self._terminal_service = terminal_service
+        self._uid = uid
+        self._interval = interval
+        self._channel = grpc.aio.insecure_channel(proxy_address)
+        self._stub = SubscriptionServiceStub(self._channel)
+
+    async def run(self):
+        while True:
+            logger.info(f"{self} opening subscription stream")
+            try:
+                async for results in self._stub.Subscribe(SubscribeRequest(uid=self._uid, interval=self._interval)):
+                    await self._terminal_service.receive_results(results)
+                logger.warning(f"{self} subscription stream closed by the proxy")
+            except grpc.aio.AioRpcError as e:
+                logger.error(f"{self} subscription stream failed: {e.code()}")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def close(self):
+        await self._channel.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(uid={self._uid}, interval={self._interval})"
@@ -1,101 +1,226 @@
 import logging
-from collections import deque
+import time
 from datetime import datetime
-from multiprocessing import Process, Queue
-from threading import Thread
-from typing import Deque, Tuple
+from multiprocessing import Process
+from typing import Optional, Tuple
 
 import matplotlib.pyplot as plt
+import numpy
+from matplotlib.axes import Axes
+from matplotlib.lines import Line2D
+from matplotlib.ticker import FuncFormatter
 
 from common.log import format_proto_msg
 from proto.services.terminal.terminal_service_pb2 import Results
+from terminal.history import HistoryBuffer
+from terminal.recorder import ResultsRecorder
+from terminal.ring_buffer import RingBuffer
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of redraws per second of the plot
+DEFAULT_FPS = 20
+# Fraction of the shown time span left empty on the right, so new results do not rescale the plot every time
+X_HEADROOM = 0.25
+# Fraction of the value range added above and below the values
+Y_MARGIN = 0.1
+# Number of results the plot process can fall behind by in history mode
+HISTORY_RING_CAPACITY = 1024
+
 
 class TerminalService:
+    """
+    Plots the last max_results results in a separate process. Results are handed to the plot process through
+    shared memory ring buffers, so receiving a result never waits for the plot.
+    The plot is redrawn at most fps times per second, and only when there are new results. Its lines are created
+    once and updated with their new data, and only they are redrawn (blitted) over a cached background, unless the
+    new data falls out of the axes limits.
+    In history mode, all the results are kept by the plot process and plotted decimated to (about) a pair of points
+    per pixel of the shown time span, instead of only the last max_results.
+    The results can also be written to a recorder, and the plot skipped altogether in headless mode.
+    """
+
     def __init__(
             self,
-            max_results: int = 50
+            max_results: int = 50,
+            fps: int = DEFAULT_FPS,
+            recorder: Optional[ResultsRecorder] = None,
+            headless: bool = False,
+            history: bool = False,
     ):
-        logger.info("Initializing TerminalService")
+        logger.info(f"Initializing TerminalService{' in headless mode' if headless else ''}")
         self._max_results = max_results
-        self._wellness_data: Queue[Deque[Tuple[str, float]]] = Queue(maxsize=max_results)
-        self._wellness_data_deque: Deque[Tuple[str, float]] = deque(maxlen=max_results)
-        self._pollution_data: Queue[Deque[Tuple[str, float]]] = Queue(maxsize=max_results)
-        self._pollution_data_deque: Deque[Tuple[str, float]] = deque(maxlen=max_results)
-        self._animation = None
+        self._fps = fps
+        self._recorder = recorder
+        self._headless = headless
+        self._history = history
+        self._ring_capacity = HISTORY_RING_CAPACITY if history else max_results
+        if not headless:
+            self._wellness_data = RingBuffer(self._ring_capacity)
+            self._pollution_data = RingBuffer(self._ring_capacity)
         self._plot_process = None
 
     async def receive_results(self, results: Results):
         logger.debug(f"Received results: {format_proto_msg(results)}")
+        if self._recorder:
+            self._recorder.write(results, time.time())
+        if self._headless:
+            return
         if results.wellness_timestamp.ToNanoseconds() != 0:
-            self._wellness_data_deque.append((
-                datetime.fromtimestamp(results.wellness_timestamp.ToNanoseconds() / 1e9).strftime('%H:%M:%S.%f'),
-                results.wellness_data
-            ))
+            self._wellness_data.append(results.wellness_timestamp.ToNanoseconds() / 1e9, results.wellness_data)
         if results.pollution_timestamp.ToNanoseconds() != 0:
-            self._pollution_data_deque.append((
-                datetime.fromtimestamp(results.pollution_timestamp.ToNanoseconds() / 1e9).strftime('%H:%M:%S.%f'),
-                results.pollution_data
-            ))
-
-        if len(self._wellness_data_deque) > self._max_results:
-            self._wellness_data_deque.popleft()
-        if len(self._pollution_data_deque) > self._max_results:
-            self._pollution_data_deque.popleft()
-
-        self._wellness_data.put(self._wellness_data_deque)
-        self._pollution_data.put(self._pollution_data_deque)
-
-    def _update_plot(self, wellness_data: Deque[Tuple[str, float]], pollution_data: Deque[Tuple[str, float]]):
-        # clear the plot
-        self._ax1.clear()
-        self._ax2.clear()
-
-        # wellness data
-        self._ax1.set_title("Wellness data")
-        self._ax1.set_xlabel("Timestamp")
-        self._ax1.set_ylabel("Wellness")
-
-        w = wellness_data
-        logger.debug(f"Plotting wellness data: {w}")
-        self._ax1.plot([x[0] for x in w], [x[1] for x in w])
-
-        # pollution data
-        self._ax2.set_title("Pollution data")
-        self._ax2.set_xlabel("Timestamp")
-        self._ax2.set_ylabel("Pollution")
-
-        p = pollution_data
-        logger.debug(f"Plotting pollution data: {p}")
-        self._ax2.plot([x[0] for x in p], [x[1] for x in p])
-
-        # format the plot
-        self._ax1.set_xticklabels(self._ax1.get_xticklabels(), rotation=45, ha='right')
-        self._ax2.set_xticklabels(self._ax2.get_xticklabels(), rotation=45, ha='right')
-        plt.subplots_adjust(bottom=0.30)
-        plt.tight_layout()
+            self._pollution_data.append(results.pollution_timestamp.ToNanoseconds() / 1e9, results.pollution_data)
+
+    async def close(self):
+        if self._recorder:
+            await self._recorder.close()
+        if self._headless:
+            return
+        if self._plot_process and self._plot_process.is_alive():
+            self._plot_process.kill()
+        self._wellness_data.close()
+        self._pollution_data.close()
+
+    def run(self):
+        logger.info("Running TerminalService")
+
+        if self._recorder:
+            self._recorder.run()
+        if self._headless:
+            return
+
+        self._plot_process = Process(
+            target=self._plot_data,
+            args=(self._wellness_data.name, self._pollution_data.name)
+        )
+        self._plot_process.start()
 
-        self._fig.canvas.draw()
+    def __getstate__(self):
+        # only the plot parameters are sent to the plot process (pickled with the spawn start method): the recorder
+        # and the process are not picklable, and the ring buffers are attached to by name
+        state = self.__dict__.copy()
+        for attr in ('_recorder', '_plot_process', '_wellness_data', '_pollution_data'):
+            state.pop(attr, None)
+        return state
 
-    def _plot_data(self, wellness_data, pollution_data):
+    def _plot_data(self, wellness_data: str, pollution_data: str):
         logger.info("Starting plot process")
-        self._fig, (self._ax1, self._ax2) = plt.subplots(2)
 
-        self._wellness_data = wellness_data
-        self._pollution_data = pollution_data
+        # attach to the ring buffers of the parent process
+        self._wellness_data = RingBuffer(self._ring_capacity, wellness_data)
+        self._pollution_data = RingBuffer(self._ring_capacity, pollution_data)
+        self._wellness_history = HistoryBuffer() if self._history else None
+        self._pollution_history = HistoryBuffer() if self._history else None
+        self._sequences = (0, 0)
+        self._background = None
+        self._dirty = False
 
-        Thread(target=self._animate).start()
+        self._fig, (self._ax1, self._ax2) = plt.subplots(2)
+        self._wellness_line = self._init_axes(self._ax1, "Wellness data", "Wellness")
+        self._pollution_line = self._init_axes(self._ax2, "Pollution data", "Pollution")
+        plt.tight_layout()
 
-        plt.show()
+        if self._history:
+            # the shown points depend on the shown time span, e.g. when zooming in
+            for ax in (self._ax1, self._ax2):
+                ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
 
-    def _animate(self):
-        while True:
-            self._update_plot(self._wellness_data.get(), self._pollution_data.get())
+        # the background is cached after every full draw (e.g. when the window is resized)
+        self._fig.canvas.mpl_connect('draw_event', self._on_draw)
 
-    def run(self):
-        logger.info("Running TerminalService")
+        # redraws run in the event loop of the figure, at most fps times per second
+        self._timer = self._fig.canvas.new_timer(interval=int(1000 / self._fps))
+        self._timer.add_callback(self._refresh)
+        self._timer.start()
 
-        self._plot_process = Process(target=self._plot_data, args=(self._wellness_data, self._pollution_data))
-        self._plot_process.start()
+        plt.show()
+
+    @staticmethod
+    def _init_axes(ax: Axes, title: str, ylabel: str) -> Line2D:
+        ax.set_title(title)
+        ax.set_xlabel("Timestamp")
+        ax.set_ylabel(ylabel)
+        ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: datetime.fromtimestamp(x).strftime('%H:%M:%S')))
+        ax.tick_params(axis='x', labelrotation=45)
+        # animated lines are left out of full draws and drawn by _blit
+        line, = ax.plot([], [], animated=True)
+        return line
+
+    def _refresh(self):
+        sequences = (self._wellness_data.sequence, self._pollution_data.sequence)
+        if sequences == self._sequences and not self._dirty:
+            return
+        self._sequences = sequences
+        rescaled = self._update_line(self._ax1, self._wellness_line, self._wellness_data, self._wellness_history)
+        rescaled = self._update_line(self._ax2, self._pollution_line, self._pollution_data,
+                                     self._pollution_history) or rescaled
+        # the limits set above are already accounted for
+        self._dirty = False
+        if rescaled or self._background is None or not self._fig.canvas.supports_blit:
+            # full draw, that calls _on_draw
+            self._fig.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def _update_line(self, ax: Axes, line: Line2D, data: RingBuffer, history: Optional[HistoryBuffer]) -> bool:
+        """
+        Sets the data of a line and the limits of its axes if the data does not fit in them.
+        :return: whether the limits changed.
+        """
+        follow = True
+        if history is None:
+            _, timestamps, values = data.snapshot()
+        else:
+            # the time span only follows the new results if the last one was shown, so zooming in on the past
+            # is not undone by them
+            low, high = ax.get_xlim()
+            follow = not len(history) or low <= history.timestamps[-1] <= high
+            history.update(data)
+            timestamps, values = history.timestamps, history.values
+        if not len(timestamps):
+            line.set_data(timestamps, values)
+            return False
+        rescaled = False
+        # the whole history is shown, so its time span only grows
+        if follow and self._out_of_limits(ax.get_xlim(), timestamps, shrink=history is None):
+            span = max(timestamps[-1] - timestamps[0], 1)
+            ax.set_xlim(timestamps[0], timestamps[-1] + span * X_HEADROOM)
+            rescaled = True
+        if self._out_of_limits(ax.get_ylim(), values):
+            minimum, maximum = float(numpy.min(values)), float(numpy.max(values))
+            margin = (maximum - minimum) * Y_MARGIN or 1
+            ax.set_ylim(minimum - margin, maximum + margin)
+            rescaled = True
+        if history is None:
+            line.set_data(timestamps, values)
+        else:
+            line.set_data(*history.decimate(*ax.get_xlim(), int(ax.bbox.width)))
+        return rescaled
+
+    @staticmethod
+    def _out_of_limits(limits: Tuple[float, float], data: numpy.ndarray, shrink: bool = False) -> bool:
+        """
+        :return: whether the data does not fit in the limits or, if shrink, only fills their upper half
+        (as the oldest results are dropped).
+        """
+        low, high = limits
+        minimum, maximum = numpy.min(data), numpy.max(data)
+        return bool(minimum < low or maximum > high or (shrink and minimum > low + (high - low) / 2))
+
+    def _on_xlim_changed(self, _):
+        self._dirty = True
+
+    def _on_draw(self, _):
+        if self._fig.canvas.supports_blit:
+            self._background = self._fig.canvas.copy_from_bbox(self._fig.bbox)
+        self._draw_lines()
+
+    def _blit(self):
+        self._fig.canvas.restore_region(self._background)
+        self._draw_lines()
+        self._fig.canvas.blit(self._fig.bbox)
+        self._fig.canvas.flush_events()
+
+    def _draw_lines(self):
+        self._ax1.draw_artist(self._wellness_line)
+        self._ax2.draw_artist(self._pollution_line)